@@ -0,0 +1,94 @@
+"""
+Measure snapshot backups of a words file.
+
+Takes an initial snapshot of a synthetic deck, then a series of snapshots
+each after a few edits, and reports the time and disk space of each step
+next to copying the whole file on every backup.
+
+Usage (from the repository root):
+    python -m benchmarks.backups                     # 100k words
+    python -m benchmarks.backups --sizes 10000,100000 --edits 1,10,100
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_words
+from src.backup import WORDS, SnapshotStore
+from src.storage import save_words
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def run(size, edits, rounds):
+    words = generate_words(size)
+    keys = list(words)
+    rng = random.Random(size)
+    with tempfile.TemporaryDirectory() as directory:
+        words_path = os.path.join(directory, "words.json")
+        save_words(words_path, words)
+        file_size = os.path.getsize(words_path)
+        backups = SnapshotStore(os.path.join(directory, "backups"))
+
+        print(f"\nwords @ {size:,} (file {file_size / 1024 / 1024:.1f} MiB)")
+        print(f"{'step':<22} {'time':>10} {'written':>12} {'full copy':>12}")
+        seconds, entry = timed(backups.snapshot, WORDS, words)
+        print(
+            f"{'initial':<22} {seconds * 1000:>7.0f} ms"
+            f" {entry['bytes'] / 1024:>8.0f} KiB"
+            f" {file_size / 1024:>8.0f} KiB"
+        )
+        for count in edits:
+            for _ in range(rounds):
+                words = dict(words)
+                for word in rng.sample(keys, count):
+                    words[word] = list(reversed(words[word]))
+                seconds, entry = timed(backups.snapshot, WORDS, words)
+            print(
+                f"{f'{count} edits':<22} {seconds * 1000:>7.1f} ms"
+                f" {entry['bytes'] / 1024:>8.0f} KiB"
+                f" {file_size / 1024:>8.0f} KiB"
+            )
+        seconds, _ = timed(backups.snapshot, WORDS, words)
+        print(f"{'unchanged':<22} {seconds * 1000:>7.1f} ms")
+        snapshots = backups.snapshots()
+        seconds, _ = timed(backups.diff, snapshots[0]["id"], snapshots[-1]["id"], WORDS)
+        print(f"{'diff first..last':<22} {seconds * 1000:>7.1f} ms")
+        seconds, _ = timed(backups.read, snapshots[0]["id"], WORDS)
+        print(f"{'read first':<22} {seconds * 1000:>7.0f} ms")
+        stored = directory_size(backups.directory)
+        print(
+            f"{len(snapshots)} snapshots in {stored / 1024 / 1024:.1f} MiB,"
+            f" full copies would take"
+            f" {len(snapshots) * file_size / 1024 / 1024:.1f} MiB"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100000")
+    parser.add_argument(
+        "--edits", default="1,10,100", help="words changed before each snapshot"
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="snapshots per step")
+    args = parser.parse_args(argv)
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        run(size, [int(e) for e in args.edits.split(",") if e], args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Compare the file formats for the words and flashcard files.
+
+Writes a synthetic deck in every format available with the installed
+packages and reports save time, load time, streamed load time and file size
+next to the indented stdlib JSON the app used to write.
+
+Usage (from the repository root):
+    python -m benchmarks.formats                  # 100k words, cards too
+    python -m benchmarks.formats --sizes 10000,100000 --repeat 5
+    python -m benchmarks.formats --formats json,msgpack+zstd --source words
+"""
+
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_cards, generate_words
+from src import serializers
+from src.packet import json_default, sense_hook
+from src.storage import SharedStore, write_atomic
+
+LEGACY = "legacy"  # json.dump(indent=4) / json.load, the original format
+LEGACY_INDENT = {"words": 4, "cards": 2}
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_legacy(path, data, indent, repeat):
+    def save():
+        with open(path, "w") as f:
+            json.dump(data, f, indent=indent, default=json_default)
+
+    def load():
+        with open(path, "r") as f:
+            json.load(f, object_hook=sense_hook)
+
+    save_seconds = best_of(save, repeat)
+    load_seconds = best_of(load, repeat)
+    return save_seconds, load_seconds, None, os.path.getsize(path)
+
+
+def measure_format(path, data, name, repeat):
+    file_format = serializers.get_format(name)
+
+    def stream():
+        for _ in SharedStore(path).stream():
+            pass
+
+    save_seconds = best_of(lambda: write_atomic(path, data, file_format), repeat)
+    load_seconds = best_of(lambda: SharedStore(path).read(), repeat)
+    stream_seconds = best_of(stream, repeat)
+    return save_seconds, load_seconds, stream_seconds, os.path.getsize(path)
+
+
+def report(source, size, rows):
+    print(f"\n{source} @ {size:,}")
+    print(
+        f"{'format':<14} {'save':>10} {'load':>10} {'stream':>10} "
+        f"{'size':>10} {'vs legacy':>22}"
+    )
+    base_save, base_load, _, base_bytes = rows[LEGACY]
+    for name, (save, load, stream, size_bytes) in rows.items():
+        stream_text = "-" if stream is None else f"{stream * 1000:.0f} ms"
+        ratio = (
+            f"{base_load / load:4.1f}x load "
+            f"{size_bytes / base_bytes * 100:3.0f}% size"
+        )
+        print(
+            f"{name:<14} {save * 1000:>7.0f} ms {load * 1000:>7.0f} ms "
+            f"{stream_text:>10} {size_bytes / 1024 / 1024:>6.1f} MiB "
+            f"{ratio:>22}"
+        )
+
+
+def run(sizes, sources, names, repeat):
+    from src.cards import Card
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.json")
+        for size in sizes:
+            words = generate_words(size)
+            datasets = {"words": words}
+            if "cards" in sources:
+                cards = generate_cards(words)
+                # Round trip through Card so definitions are compact records.
+                datasets["cards"] = {
+                    word: Card.from_record(word, record).to_record()
+                    for word, record in cards.items()
+                }
+            for source in sources:
+                data = datasets[source]
+                rows = {
+                    LEGACY: measure_legacy(path, data, LEGACY_INDENT[source], repeat)
+                }
+                for name in names:
+                    rows[name] = measure_format(path, data, name, repeat)
+                report(source, size, rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100000")
+    parser.add_argument(
+        "--formats",
+        default=",".join(serializers.available_formats()),
+        help="comma separated formats (default: all installed)",
+    )
+    parser.add_argument("--source", choices=("words", "cards", "both"), default="both")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    names = [s for s in args.formats.split(",") if s]
+    for name in names:
+        serializers.get_format(name)  # Fail early on unavailable formats
+    sources = ("words", "cards") if args.source == "both" else (args.source,)
+    print(f"orjson: {'yes' if serializers.orjson else 'no'}")
+    run(sizes, sources, names, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Compare hedged provider lookups against a single provider.
+
+Uses local stand-in providers whose latency has a long tail (most lookups
+are quick, a few stall) and reports lookup latency percentiles and how many
+provider calls each lookup cost, for a single provider and for
+``ProviderPool`` with several hedge delays.
+
+Usage (from the repository root):
+    python -m benchmarks.hedging
+    python -m benchmarks.hedging --providers 3 --delays 0,0.05,0.2 --lookups 500
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.load_fetch import percentile
+from benchmarks.synthetic import make_word
+from src.backend import LookupCancelled, Provider, ProviderPool
+
+
+class StandInProvider(Provider):
+    """
+    Answers every word after a simulated delay.
+
+    Args:
+        name (str): Provider name
+        median (float): Typical latency in seconds
+        tail (float): Share of lookups that stall
+        stall (float): Latency of a stalled lookup in seconds
+        failure_rate (float): Share of lookups that raise
+    """
+
+    def __init__(self, name, median, tail, stall, failure_rate=0.0, seed=0):
+        self.name = name
+        self.median = median
+        self.tail = tail
+        self.stall = stall
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def lookup(self, word, cancelled):
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+            delay = self.median * self._random.uniform(0.7, 1.3)
+        if roll < self.tail:
+            delay = self.stall
+        if cancelled.wait(delay):
+            raise LookupCancelled()
+        if roll > 1 - self.failure_rate:
+            raise RuntimeError(f"{self.name} failed")
+        return [{"part_of_speech": "noun", "definition": word, "example": None}]
+
+
+def make_providers(count, args):
+    return [
+        StandInProvider(
+            f"standin{index + 1}",
+            args.median * (1 + 0.25 * index),
+            args.tail,
+            args.stall,
+            args.failure_rate,
+            seed=index,
+        )
+        for index in range(count)
+    ]
+
+
+def run(pool, providers, lookups):
+    latencies = []
+    failures = 0
+    for index in range(lookups):
+        start = time.perf_counter()
+        try:
+            pool.lookup(make_word(index))
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    calls = sum(provider.calls for provider in providers)
+    return latencies, calls / lookups, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--providers", type=int, default=2)
+    parser.add_argument("--delays", default="0,0.03,0.1", help="hedge delays in s")
+    parser.add_argument("--lookups", type=int, default=300)
+    parser.add_argument("--median", type=float, default=0.02, help="seconds")
+    parser.add_argument("--tail", type=float, default=0.05, help="share stalling")
+    parser.add_argument("--stall", type=float, default=0.5, help="seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    configurations = [("single", 1, None)]
+    for delay in (float(d) for d in args.delays.split(",") if d):
+        configurations.append((f"hedged {delay * 1000:.0f} ms", args.providers, delay))
+
+    print(
+        f"{'configuration':<18} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"
+        f" {'max ms':>8} {'calls':>6} {'failed':>7}"
+    )
+    for label, count, delay in configurations:
+        providers = make_providers(count, args)
+        pool = ProviderPool(providers, hedge_delay=delay or 0)
+        latencies, calls, failures = run(pool, providers, args.lookups)
+        print(
+            f"{label:<18} {percentile(latencies, 0.5) * 1000:>8.1f}"
+            f" {percentile(latencies, 0.9) * 1000:>8.1f}"
+            f" {percentile(latencies, 0.99) * 1000:>8.1f}"
+            f" {latencies[-1] * 1000:>8.1f} {calls:>6.2f} {failures:>7}"
+        )
+        if count > 1:
+            print(f"  {pool.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
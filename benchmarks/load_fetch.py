@@ -0,0 +1,164 @@
+"""
+Load-testing harness for the dictionary fetch path.
+
+Drives ``src.backend.get_response`` or ``get_word_packet`` at increasing
+concurrency against the local mock API (or any compatible server) and reports
+throughput, latency percentiles and how failures surfaced. The
+``fetch_packets`` target runs the batch API instead, where concurrency is the
+worker cap and latency is the time until each word completed.
+
+Usage (from the repository root):
+    python -m benchmarks.load_fetch --concurrency 1,8,32 --requests 400 \\
+        --latency 60 --jitter 40 --error-rate 0.02 --not-found-rate 0.1
+    python -m benchmarks.load_fetch --url http://127.0.0.1:8765/api
+    python -m benchmarks.load_fetch --target fetch_packets --max-rps 40
+"""
+
+import argparse
+import contextlib
+import io
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.mock_api import add_server_arguments, server_from_args
+from benchmarks.synthetic import make_word
+from src import backend
+
+
+def classify_response(word):
+    try:
+        backend.get_response(word)
+    except ValueError:
+        return "not_found"
+    except requests.exceptions.RequestException:
+        return "error"
+    return "ok"
+
+
+def classify_packet(word):
+    try:
+        packet = backend.get_word_packet(word)
+    except requests.exceptions.RequestException as e:
+        return type(e).__name__
+    return "ok" if packet else "empty"
+
+
+TARGETS = {
+    "get_response": classify_response,
+    "get_word_packet": classify_packet,
+    "fetch_packets": None,
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_batch(words, concurrency):
+    """Run the batch API over ``words`` with at most ``concurrency`` workers."""
+    results = []
+    start = time.perf_counter()
+    for word, packet, error in backend.fetch_packets(words, max_workers=concurrency):
+        if error is not None:
+            outcome = type(error).__name__
+        else:
+            outcome = "ok" if packet else "empty"
+        results.append((outcome, time.perf_counter() - start))
+    return results, time.perf_counter() - start
+
+
+def run_level(target, words, concurrency):
+    """Run ``target`` over ``words`` with ``concurrency`` threads."""
+
+    def timed(word):
+        start = time.perf_counter()
+        try:
+            outcome = target(word)
+        except Exception as e:  # Anything escaping the backend is a bug
+            outcome = f"raised {type(e).__name__}"
+        return outcome, time.perf_counter() - start
+
+    start = time.perf_counter()
+    # get_word_packet prints every failure; keep the report readable.
+    with contextlib.redirect_stdout(io.StringIO()):
+        if target is None:
+            results, elapsed = run_batch(words, concurrency)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(timed, words))
+            elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "seconds": elapsed,
+        "throughput": len(results) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p90": percentile(latencies, 0.90),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else 0.0,
+        "outcomes": Counter(outcome for outcome, _ in results),
+    }
+
+
+def print_report(rows):
+    print(
+        f"{'conc':>5} {'reqs':>6} {'req/s':>9} {'p50 ms':>9} {'p90 ms':>9}"
+        f" {'p99 ms':>9} {'max ms':>9}  outcomes"
+    )
+    for row in rows:
+        outcomes = ", ".join(f"{k}={v}" for k, v in sorted(row["outcomes"].items()))
+        print(
+            f"{row['concurrency']:>5} {row['requests']:>6} {row['throughput']:>9.1f}"
+            f" {row['p50'] * 1000:>9.1f} {row['p90'] * 1000:>9.1f}"
+            f" {row['p99'] * 1000:>9.1f} {row['max'] * 1000:>9.1f}  {outcomes}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch path load test")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="get_word_packet")
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--requests", type=int, default=200, help="per level")
+    parser.add_argument(
+        "--url", help="use an already running server instead of a bundled one"
+    )
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    target = TARGETS[args.target]
+    server = None
+    if args.url:
+        backend.API_BASE_URL = args.url
+    else:
+        server = server_from_args(args).start()
+        backend.API_BASE_URL = server.url
+
+    rows = []
+    try:
+        offset = 0
+        for concurrency in levels:
+            words = [make_word(offset + i) for i in range(args.requests)]
+            offset += args.requests
+            rows.append(run_level(target, words, concurrency))
+    finally:
+        if server:
+            server.stop()
+
+    print(f"Target: {args.target} against {backend.API_BASE_URL}")
+    print_report(rows)
+    print(f"Limiter: {backend.API_LIMITER.snapshot()}")
+    if server:
+        print(f"Server: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
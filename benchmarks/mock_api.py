@@ -0,0 +1,296 @@
+"""
+Local stand-in for the Free Dictionary API.
+
+Serves ``/api/{version}/entries/en/{word}`` with responses shaped like
+dictionaryapi.dev, generated deterministically from the word so repeated
+lookups return the same entry. Latency, server errors, unknown words and rate
+limiting are configurable, which makes the fetch path testable offline.
+
+Usage (from the repository root):
+    python -m benchmarks.mock_api --port 8765 --latency 80 --error-rate 0.02
+    DICTIONARY_API_URL=http://127.0.0.1:8765/api python runner.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from benchmarks.synthetic import make_packet
+
+ENTRY_PATH = re.compile(r"^/api/(v\d+)/entries/en/([^/?#]+)$")
+
+NOT_FOUND_BODY = {
+    "title": "No Definitions Found",
+    "message": "Sorry pal, we couldn't find definitions for the word you were looking for.",
+    "resolution": "You can try the search again at later time or head to the web instead.",
+}
+
+RATE_LIMITED_BODY = {
+    "title": "Too Many Requests",
+    "message": "You have exceeded the rate limit.",
+    "resolution": "Retry after the number of seconds given in Retry-After.",
+}
+
+
+def _word_seed(word):
+    return zlib.crc32(word.lower().encode("utf-8"))
+
+
+def make_entries(word, revision=0):
+    """Build an API response body (list of entries) for ``word``."""
+    rng = random.Random(_word_seed(word) + revision)
+    meanings = {}
+    for sense in make_packet(rng, word):
+        meaning = meanings.setdefault(
+            sense["part_of_speech"],
+            {
+                "partOfSpeech": sense["part_of_speech"],
+                "definitions": [],
+                "synonyms": [],
+                "antonyms": [],
+            },
+        )
+        definition = {
+            "definition": sense["definition"],
+            "synonyms": [],
+            "antonyms": [],
+        }
+        if sense["example"]:
+            definition["example"] = sense["example"]
+        meaning["definitions"].append(definition)
+    return [
+        {
+            "word": word,
+            "phonetic": f"/{word}/",
+            "phonetics": [{"text": f"/{word}/", "audio": ""}],
+            "meanings": list(meanings.values()),
+            "license": {"name": "CC BY-SA 3.0", "url": ""},
+            "sourceUrls": [f"https://en.wiktionary.org/wiki/{word}"],
+        }
+    ]
+
+
+class TokenBucket:
+    """Server-side request budget; ``rate`` of 0 disables the limit."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Consume a token; return 0 on success or seconds until one is free."""
+        if self.rate <= 0:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+class MockDictionaryServer:
+    """
+    Threaded HTTP server imitating dictionaryapi.dev.
+
+    Args:
+        port (int): Port to bind, 0 picks a free one
+        latency (float): Mean response latency in milliseconds
+        jitter (float): Uniform latency jitter in milliseconds (+/-)
+        error_rate (float): Fraction of requests answered with HTTP 500
+        not_found_rate (float): Fraction of words that are unknown (HTTP 404),
+            decided per word so the answer is stable
+        rate_limit_rate (float): Fraction of requests randomly answered 429
+        max_rps (float): Sustained requests per second before answering 429
+        retry_after (float): Retry-After seconds sent with random 429s
+        revision (int): Content revision; changing it changes every entry,
+            which lets conditional re-fetching be exercised
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        not_found_rate=0.0,
+        rate_limit_rate=0.0,
+        max_rps=0.0,
+        retry_after=1.0,
+        revision=0,
+        seed=None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.not_found_rate = not_found_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.revision = revision
+        self.bucket = TokenBucket(max_rps)
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "304": 0,
+            "404": 0,
+            "429": 0,
+            "500": 0,
+        }
+        self.stats_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        """Base URL to use as ``src.backend.API_BASE_URL``."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _roll(self):
+        with self.random_lock:
+            return self.random.random(), self.random.uniform(-1, 1)
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            self.stats[key] += 1
+
+    def respond(self, word):
+        """Return ``(status, headers, body)`` for a lookup of ``word``."""
+        roll, jitter = self._roll()
+        delay = max(0.0, self.latency + jitter * self.jitter) / 1000
+        if delay:
+            time.sleep(delay)
+
+        wait = self.bucket.take()
+        if wait or roll < self.rate_limit_rate:
+            self._count("429")
+            retry_after = max(1, round(wait or self.retry_after))
+            return 429, {"Retry-After": str(retry_after)}, RATE_LIMITED_BODY
+        roll -= self.rate_limit_rate
+        if 0 <= roll < self.error_rate:
+            self._count("500")
+            return 500, {}, {"title": "Internal Server Error"}
+        if (_word_seed(word) % 10_000) / 10_000 < self.not_found_rate:
+            self._count("404")
+            return 404, {}, NOT_FOUND_BODY
+        self._count("ok")
+        return 200, {}, make_entries(word, self.revision)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                match = ENTRY_PATH.match(self.path)
+                if match is None:
+                    status, headers, body = 404, {}, NOT_FOUND_BODY
+                else:
+                    status, headers, body = server.respond(unquote(match.group(2)))
+                payload = json.dumps(body).encode("utf-8")
+                if status == 200:
+                    etag = f'"{zlib.crc32(payload):08x}"'
+                    headers = {"ETag": etag}
+                    if self.headers.get("If-None-Match") == etag:
+                        with server.stats_lock:
+                            server.stats["ok"] -= 1
+                            server.stats["304"] += 1
+                        status, payload = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if status != 304:
+                    self.send_header("Content-Length", str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def add_server_arguments(parser):
+    """Register the server behaviour options on ``parser``."""
+    parser.add_argument("--latency", type=float, default=0.0, help="mean ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- ms")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--not-found-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--revision", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def server_from_args(args, port=0):
+    return MockDictionaryServer(
+        port=port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        not_found_rate=args.not_found_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        max_rps=args.max_rps,
+        retry_after=args.retry_after,
+        revision=args.revision,
+        seed=args.seed,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Free Dictionary API")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = server_from_args(args, port=args.port)
+    print(f"Serving mock dictionary API at {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Benchmark suite for storage, search and scheduling.
+
+Runs the hot paths of the dictionary and flashcard windows against synthetic
+decks, records wall time, peak memory and the memory still held afterwards
+(e.g. the loaded deck) and compares them against a stored baseline. Widgets
+are created on the offscreen Qt platform, so the suite runs headlessly.
+
+Usage (from the repository root):
+    python -m benchmarks.run                       # compare against baseline
+    python -m benchmarks.run --sizes 1000,1000000  # pick deck sizes
+    python -m benchmarks.run --save-baseline       # record a new baseline
+
+The process exits with status 1 when any case regresses beyond tolerance.
+"""
+
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_cards, generate_words
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Differences below these floors are noise, whatever the relative change.
+TIME_FLOOR = 0.005
+MEMORY_FLOOR = 256 * 1024
+
+
+class Context:
+    """Synthetic deck for one size, written to a scratch directory."""
+
+    def __init__(self, size, directory, app):
+        from src.cards import FlashcardManager
+
+        self.size = size
+        self.directory = directory
+        self.app = app
+        self.words = generate_words(size)
+        self.words_path = os.path.join(directory, "words.json")
+        self.cards_path = os.path.join(directory, "flashcards.json")
+        self.scratch_path = os.path.join(directory, "scratch.json")
+
+        app.words_data = self.words
+        app.json_path = self.words_path
+        app.save_data()
+        with open(self.cards_path, "w") as f:
+            json.dump(generate_cards(self.words), f, indent=2)
+
+        app.word_list.clear()
+        app.word_list.addItems(self.words.keys())
+
+        self.manager = FlashcardManager()
+        self.manager.data_file = self.cards_path
+        self.manager.load_cards(self.words_path)
+
+    def new_manager(self, data_file):
+        from src.cards import FlashcardManager
+
+        manager = FlashcardManager()
+        manager.data_file = data_file
+        if not manager.load_cards(self.words_path):
+            raise RuntimeError("load_cards failed")
+        return manager
+
+
+def bench_load_data(ctx):
+    from src.storage import LOAD_CHUNK, SharedStore, chunked
+
+    # start_loading without the DISK lane: the file is streamed and each
+    # chunk inserted into the window as the progress signal would.
+    def run():
+        app = ctx.app
+        app.json_path = ctx.words_path
+        app.store = SharedStore(ctx.words_path)
+        app.dirty_words = set()
+        app.words_data = {}
+        app.headwords.clear()
+        app.word_list.clear()
+        app.loading = True
+        for chunk in chunked(app.store.stream(), LOAD_CHUNK):
+            app.on_words_loaded(chunk)
+        app.loading = False
+        app.store.loaded = True
+
+    return run
+
+
+def bench_stream_words(ctx):
+    from src.storage import SharedStore
+
+    def run():
+        for _ in SharedStore(ctx.words_path).stream():
+            pass
+
+    return run
+
+
+def bench_first_chunk(ctx):
+    from src.storage import LOAD_CHUNK, SharedStore, chunked
+
+    # What a starting window waits for before the list shows words.
+    return lambda: next(chunked(SharedStore(ctx.words_path).stream(), LOAD_CHUNK))
+
+
+def bench_save_data(ctx):
+    def run():
+        ctx.app.words_data = ctx.words
+        ctx.app.json_path = ctx.scratch_path
+        ctx.app.save_data()
+
+    return run
+
+
+def bench_filter_word_list(ctx):
+    def run():
+        for text in ("ba", "zzz", "Ci", ""):
+            ctx.app.filter_word_list(text)
+
+    return run
+
+
+def bench_load_cards_initial(ctx):
+    missing = os.path.join(ctx.directory, "missing.json")
+    return lambda: ctx.new_manager(missing)
+
+
+def bench_load_cards(ctx):
+    return lambda: ctx.new_manager(ctx.cards_path)
+
+
+def bench_update_due_cards(ctx):
+    return ctx.manager.update_due_cards
+
+
+def bench_update_stats(ctx):
+    return ctx.manager.update_stats
+
+
+def bench_save_cards(ctx):
+    def run():
+        ctx.manager.data_file = ctx.scratch_path
+        if not ctx.manager.save_cards():
+            raise RuntimeError("save_cards failed")
+
+    return run
+
+
+CASES = {
+    "load_data": bench_load_data,
+    "stream_words": bench_stream_words,
+    "first_chunk": bench_first_chunk,
+    "save_data": bench_save_data,
+    "filter_word_list": bench_filter_word_list,
+    "load_cards_initial": bench_load_cards_initial,
+    "load_cards": bench_load_cards,
+    "update_due_cards": bench_update_due_cards,
+    "update_stats": bench_update_stats,
+    "save_cards": bench_save_cards,
+}
+
+
+def measure(func, repeat):
+    """
+    Return the best wall time over ``repeat`` runs, the peak memory and the
+    memory allocated by the last run that is still alive afterwards.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, retained
+
+
+def run_suite(sizes, cases, repeat):
+    from PyQt6.QtWidgets import QApplication
+    from src.view import DictionaryApp
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        window = DictionaryApp(os.path.join(directory, "words.json"))
+        # Keep background refreshes and backups out of the timings.
+        window.refresh_timer.stop()
+        window.backups = None
+        for size in sizes:
+            ctx = Context(size, directory, window)
+            for name in cases:
+                seconds, peak, retained = measure(CASES[name](ctx), repeat)
+                results[f"{name}@{size}"] = {
+                    "seconds": round(seconds, 6),
+                    "peak_bytes": peak,
+                    "retained_bytes": retained,
+                }
+                print(
+                    f"{name:<20} {size:>9,}  {seconds * 1000:>10.2f} ms"
+                    f"  {peak / 1024 / 1024:>9.2f} MiB"
+                    f"  {retained / 1024 / 1024:>9.2f} MiB held",
+                    flush=True,
+                )
+            del ctx
+        window.close()
+    app.processEvents()
+    return results
+
+
+def compare(results, baseline, time_tolerance, memory_tolerance):
+    """Return a list of human readable regression descriptions."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        seconds, base_seconds = current["seconds"], previous["seconds"]
+        if (
+            seconds > base_seconds * (1 + time_tolerance)
+            and seconds - base_seconds > TIME_FLOOR
+        ):
+            regressions.append(
+                f"{key}: {seconds * 1000:.2f} ms vs baseline "
+                f"{base_seconds * 1000:.2f} ms"
+            )
+        for field, label in (("peak_bytes", "peak"), ("retained_bytes", "held")):
+            if field not in previous:
+                continue
+            size, base_size = current[field], previous[field]
+            if (
+                size > base_size * (1 + memory_tolerance)
+                and size - base_size > MEMORY_FLOOR
+            ):
+                regressions.append(
+                    f"{key}: {label} {size / 1024 / 1024:.2f} MiB vs baseline "
+                    f"{base_size / 1024 / 1024:.2f} MiB"
+                )
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="comma separated deck sizes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cases",
+        default=",".join(CASES),
+        help="comma separated subset of cases to run",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="merge the results into the baseline file instead of comparing",
+    )
+    parser.add_argument("--time-tolerance", type=float, default=0.5)
+    parser.add_argument("--memory-tolerance", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        print(f"Unknown cases: {', '.join(sorted(unknown))}")
+        return 2
+
+    results = run_suite(sizes, cases, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("No baseline found; run with --save-baseline to record one.")
+        return 0
+
+    regressions = compare(
+        results, baseline, args.time_tolerance, args.memory_tolerance
+    )
+    if regressions:
+        print("\nPerformance regressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Synthetic deck generator used by the benchmark suite.
+
+Decks have the same shape as ``data/words.json``: a mapping of headwords to
+packets, where each packet is a list of senses with ``part_of_speech``,
+``definition`` and ``example`` keys. Sense counts and example frequency follow
+roughly what the Free Dictionary API returns for everyday vocabulary.
+"""
+
+import datetime
+import random
+
+PARTS_OF_SPEECH = (
+    ("noun", 45),
+    ("verb", 25),
+    ("adjective", 18),
+    ("adverb", 7),
+    ("interjection", 2),
+    ("preposition", 2),
+    ("conjunction", 1),
+)
+
+# Most words have a handful of senses, a long tail has dozens.
+SENSE_COUNTS = (
+    (1, 22),
+    (2, 20),
+    (3, 15),
+    (4, 11),
+    (5, 8),
+    (6, 6),
+    (8, 6),
+    (10, 5),
+    (14, 4),
+    (20, 2),
+    (30, 1),
+)
+
+EXAMPLE_PROBABILITY = 0.45
+
+SYLLABLES = (
+    "ab", "ac", "ad", "al", "an", "ar", "ba", "be", "bi", "bo", "ca", "ce",
+    "ci", "co", "da", "de", "di", "do", "el", "en", "er", "es", "fa", "fe",
+    "fi", "fo", "ga", "ge", "gi", "go", "ha", "he", "hi", "ho", "in", "ir",
+    "is", "la", "le", "li", "lo", "ma", "me", "mi", "mo", "na", "ne", "ni",
+    "no", "or", "pa", "pe", "pi", "po", "ra", "re", "ri", "ro", "sa", "se",
+    "si", "so", "ta", "te", "ti", "to", "un", "ur", "va", "ve", "vi", "vo",
+)
+
+FILLER = (
+    "the", "a", "of", "to", "in", "that", "which", "with", "for", "as",
+    "state", "quality", "act", "something", "person", "place", "condition",
+    "being", "having", "making", "especially", "used", "when", "someone",
+    "very", "without", "great", "small", "kind", "manner", "process",
+)
+
+
+def _weighted(rng, table):
+    values, weights = zip(*table)
+    return rng.choices(values, weights=weights)[0]
+
+
+def _sentence(rng, low, high):
+    words = rng.choices(FILLER, k=rng.randint(low, high))
+    return " ".join(words).capitalize() + "."
+
+
+def make_word(index):
+    """Return a unique, pronounceable headword for ``index``."""
+    word = ""
+    n = index
+    while True:
+        n, r = divmod(n, len(SYLLABLES))
+        word += SYLLABLES[r]
+        if n == 0:
+            break
+        n -= 1
+    return word
+
+
+def make_packet(rng, word):
+    """Build a packet for ``word`` with a realistic number of senses."""
+    packet = []
+    for _ in range(_weighted(rng, SENSE_COUNTS)):
+        example = None
+        if rng.random() < EXAMPLE_PROBABILITY:
+            example = f"{_sentence(rng, 3, 7)[:-1]} {word}."
+        packet.append(
+            {
+                "part_of_speech": _weighted(rng, PARTS_OF_SPEECH),
+                "definition": _sentence(rng, 6, 16),
+                "example": example,
+            }
+        )
+    return packet
+
+
+def generate_words(count, seed=0):
+    """Generate a ``words.json``-shaped mapping with ``count`` headwords."""
+    rng = random.Random(seed)
+    return {make_word(i): make_packet(rng, make_word(i)) for i in range(count)}
+
+
+def generate_cards(words_data, seed=0, today=None):
+    """
+    Generate ``flashcards.json``-shaped data for ``words_data``.
+
+    Roughly a third of the cards are new, the rest are spread over review
+    intervals so that a realistic share of them is due today.
+    """
+    rng = random.Random(seed)
+    today = today or datetime.datetime.now().date()
+    cards = {}
+    for word, definitions in words_data.items():
+        repetitions = 0 if rng.random() < 0.33 else rng.randint(1, 12)
+        interval = 0 if repetitions == 0 else rng.choice((1, 3, 7, 15, 30, 60))
+        last_review = None
+        if repetitions:
+            last_review = today - datetime.timedelta(days=rng.randint(0, interval))
+        next_review = (last_review or today) + datetime.timedelta(days=interval)
+        cards[word] = {
+            "definitions": definitions,
+            "ease_factor": round(rng.uniform(1.3, 3.0), 2),
+            "interval": interval,
+            "repetitions": repetitions,
+            "next_review": next_review.strftime("%Y-%m-%d"),
+            "last_review": (
+                last_review.strftime("%Y-%m-%d") if last_review else None
+            ),
+        }
+    return cards
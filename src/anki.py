@@ -1,7 +1,5 @@
-import json
-import datetime
-import random
 import os
+
 from PyQt6.QtWidgets import (
     QMainWindow,
     QWidget,
@@ -16,201 +14,82 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QPalette
 
-from src.backend import resource_path
-
-
-class Card:
-    """Represents a flashcard with spaced repetition data."""
+from src.backup import CARDS, SnapshotStore, backup_dir
+from src.cards import FlashcardManager
+from src.decks import DEFAULT_DECK, DeckRegistry
+from src.prefetch import Prefetcher
+from src.tasks import DISK, PRIORITY_PREFETCH, TaskScheduler
+from src.watcher import FileChangeWatcher
 
-    def __init__(self, word, definitions):
-        self.word = word
-        self.definitions = definitions
-        self.ease_factor = 2.5  # Initial ease factor (SM-2 algorithm)
-        self.interval = 0  # Days between reviews
-        self.repetitions = 0  # Number of successful reviews
-        self.next_review = datetime.datetime.now().date()
-        self.last_review = None
-
-    def process_response(self, quality):
-        """
-        Update card based on response quality (0-5):
-        0-2: Incorrect (start over)
-        3: Correct but difficult
-        4: Correct
-        5: Correct and easy
-        """
-        self.last_review = datetime.datetime.now().date()
+PREFETCH_CARDS = 3  # Upcoming due cards prepared in the background
 
-        if quality < 3:
-            # Failed, reset
-            self.repetitions = 0
-            self.interval = 0
-        else:
-            # Correct response
-            if self.repetitions == 0:
-                self.interval = 1
-            elif self.repetitions == 1:
-                self.interval = 3
-            else:
-                self.interval = round(self.interval * self.ease_factor)
-
-            # Increase repetition counter
-            self.repetitions += 1
-
-            # Update ease factor (SM-2 algorithm)
-            self.ease_factor += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
-            if self.ease_factor < 1.3:
-                self.ease_factor = 1.3
-
-        # Set next review date
-        self.next_review = datetime.datetime.now().date() + datetime.timedelta(
-            days=self.interval
-        )
-
-        return self.interval
-
-    def is_due(self):
-        """Check if card is due for review."""
-        return self.next_review <= datetime.datetime.now().date()
-
-    def get_formatted_definitions(self):
-        """Format all definitions for display."""
-        result = ""
-        for i, definition_dict in enumerate(self.definitions, 1):
-            result += f"<p><b>{i}. ({definition_dict['part_of_speech']})</b> {definition_dict['definition']}</p>"
-            if definition_dict["example"] and definition_dict["example"] != "null":
-                result += f"<p><i>Example:</i> {definition_dict['example']}</p>"
-        return result
-
-
-class FlashcardManager:
-    """Manages the flashcard collection and spaced repetition system."""
-
-    def __init__(self):
-        self.cards = {}
-        self.current_card = None
-        self.due_cards = []
-        self.data_file = resource_path("data/flashcards.json")
-        self.stats = {"learned": 0, "reviewing": 0, "new": 0}
-
-    def load_cards(self, initial_data_file=resource_path("data/words.json")):
-        """Load cards from JSON file or create from initial data."""
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, "r") as f:
-                    data = json.load(f)
-                    for word, card_data in data.items():
-                        self.cards[word] = Card(word, card_data["definitions"])
-                        self.cards[word].ease_factor = card_data["ease_factor"]
-                        self.cards[word].interval = card_data["interval"]
-                        self.cards[word].repetitions = card_data["repetitions"]
-                        self.cards[word].next_review = datetime.datetime.strptime(
-                            card_data["next_review"], "%Y-%m-%d"
-                        ).date()
-                        if card_data.get("last_review"):
-                            self.cards[word].last_review = datetime.datetime.strptime(
-                                card_data["last_review"], "%Y-%m-%d"
-                            ).date()
-            elif os.path.exists(initial_data_file):
-                with open(initial_data_file, "r") as f:
-                    words_data = json.load(f)
-                    for word, definitions in words_data.items():
-                        self.cards[word] = Card(word, definitions)
-
-            self.update_due_cards()
-            self.update_stats()
-        except Exception as e:
-            print(f"Error loading cards: {e}")
-            return False
-        return True
-
-    def save_cards(self):
-        """Save cards to JSON file."""
-        try:
-            data = {}
-            for word, card in self.cards.items():
-                data[word] = {
-                    "definitions": card.definitions,
-                    "ease_factor": card.ease_factor,
-                    "interval": card.interval,
-                    "repetitions": card.repetitions,
-                    "next_review": card.next_review.strftime("%Y-%m-%d"),
-                    "last_review": (
-                        card.last_review.strftime("%Y-%m-%d")
-                        if card.last_review
-                        else None
-                    ),
-                }
-
-            with open(self.data_file, "w") as f:
-                json.dump(data, f, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error saving cards: {e}")
-            return False
-
-    def update_due_cards(self):
-        """Update the list of cards due for review."""
-        self.due_cards = [card for card in self.cards.values() if card.is_due()]
-        random.shuffle(self.due_cards)
-
-    def get_next_card(self):
-        """Get the next card due for review."""
-        if not self.due_cards:
-            self.update_due_cards()
-            if not self.due_cards:
-                return None
-
-        if self.due_cards:
-            self.current_card = self.due_cards.pop(0)
-            return self.current_card
-        return None
 
-    def process_response(self, quality):
-        """Process response for current card."""
-        if self.current_card:
-            interval = self.current_card.process_response(quality)
-            self.save_cards()
-            self.update_stats()
-            return interval
-        return 0
-
-    def update_stats(self):
-        """Update statistics about card status."""
-        today = datetime.datetime.now().date()
-        self.stats = {"learned": 0, "reviewing": 0, "new": 0}
-
-        for card in self.cards.values():
-            if card.repetitions == 0:
-                self.stats["new"] += 1
-            elif card.interval >= 21:  # Considered "learned" if interval is 21+ days
-                self.stats["learned"] += 1
-            else:
-                self.stats["reviewing"] += 1
-
-        return self.stats
+def stream_cards(manager, initial_data_file, report):
+    """Parse the cards file, reporting ``(cards, created)`` chunks."""
+    for chunk in manager.stream_cards(initial_data_file):
+        if not report(chunk):
+            break
 
 
 class FlashcardApp(QMainWindow):
-    """Main application window."""
+    """
+    Main application window.
+
+    Args:
+        scheduler (TaskScheduler): Scheduler shared with the dictionary
+        deck (str): Deck to review
+        registry (DeckRegistry): Deck registry
+        words_path (str): Review the cards of this words file instead of a
+            deck; they are kept in flashcards.json next to it
+    """
 
     closed = pyqtSignal()
 
-    def __init__(self):
+    def __init__(
+        self, scheduler=None, deck=DEFAULT_DECK, registry=None, words_path=None
+    ):
         super().__init__()
-        self.manager = FlashcardManager()
+        self.registry = registry or DeckRegistry()
+        if words_path is None:
+            self.deck = deck
+            self.words_path = self.registry.words_path(deck)
+            cards_path = self.registry.cards_path(deck)
+        else:
+            # Not part of any deck, so it is not in the deck index either.
+            self.deck = None
+            self.words_path = words_path
+            cards_path = os.path.join(os.path.dirname(words_path), "flashcards.json")
+        self.manager = FlashcardManager(cards_path)
         self.card_flipped = False
+        self.scheduler = scheduler or TaskScheduler(self)
+        self.prefetcher = Prefetcher(self.scheduler)
+        self.backups = SnapshotStore(backup_dir(self.manager.data_file))
+        self.manager.on_saved = self.backup_cards
         self.setup_ui()
 
-        # Load cards
-        if not self.manager.load_cards():
-            QMessageBox.warning(
-                self, "Warning", "Failed to load cards. Starting with empty deck."
-            )
+        # Reviews saved by other windows or instances of the app.
+        self.file_watcher = FileChangeWatcher(self)
+        self.file_watcher.changed.connect(self.check_external_changes)
+        self.file_watcher.watch(self.manager.data_file)
+
+        # Load cards in the background; reviews can start on the first chunk.
+        self.loading = True
+        self.manager.load_parameters()
+        self.scheduler.submit(
+            DISK,
+            ("load", self.manager.data_file),
+            stream_cards,
+            self.manager,
+            self.words_path,
+            on_progress=self.on_cards_loaded,
+            on_finished=self.on_loading_finished,
+            on_error=self.on_loading_failed,
+        )
 
     def setup_ui(self):
         """Set up the user interface."""
-        self.setWindowTitle("Flashcard App")
+        title = self.deck or os.path.basename(self.words_path)
+        self.setWindowTitle(f"Flashcard App - {title}")
         self.setMinimumSize(800, 600)
         self.setObjectName("flashcard-app")
 
@@ -345,6 +224,7 @@ class FlashcardApp(QMainWindow):
         self.word_title.setText(card.word)
         self.definitions_label.setText(card.get_formatted_definitions())
         self.card_stack.setCurrentIndex(0)
+        self.prefetcher.warm_cards(self.manager.due_cards[:PREFETCH_CARDS])
 
         # Hide response buttons
         for btn in self.response_buttons:
@@ -400,8 +280,89 @@ class FlashcardApp(QMainWindow):
         self.reviewing_label.setText(f"Reviewing: {stats['reviewing']}")
         self.learned_label.setText(f"Learned: {stats['learned']}")
 
+    def on_cards_loaded(self, chunk):
+        cards, created = chunk
+        self.manager.add_cards(cards, created)
+        self.update_stats_display()
+
+    def on_loading_finished(self, _):
+        self.loading = False
+        self.manager.finish_loading()
+        self.update_stats_display()
+        self.record_summary()
+        self.check_external_changes()
+
+    def on_loading_failed(self, message):
+        self.loading = False
+        print(f"Error loading cards: {message}")
+        QMessageBox.warning(
+            self, "Warning", "Failed to load cards. Starting with empty deck."
+        )
+
+    def check_external_changes(self):
+        """Pick up cards saved by other windows, reading the file on DISK."""
+        store = self.manager.store
+        key = ("poll", store.path)
+        if self.loading or not store.changed_on_disk():
+            # Loading checks once every card is in.
+            return
+        if self.scheduler.is_pending(key):
+            # on_cards_polled checks again once that poll is done.
+            return
+        since = store.signature
+        self.scheduler.submit(
+            DISK,
+            key,
+            store.read_changes,
+            *self.manager.poll_arguments(),
+            since,
+            on_finished=lambda result: self.on_cards_polled(store, since, result),
+            on_error=lambda message: print(f"Error reading cards: {message}"),
+        )
+
+    def on_cards_polled(self, store, since, result):
+        if store is not self.manager.store:
+            return
+        if self.manager.apply_polled(since, result):
+            self.update_stats_display()
+        if store.changed_on_disk():
+            self.check_external_changes()
+
+    def record_summary(self):
+        """
+        Keep the cross-deck due counts in the deck index current.
+
+        Walks every card and rewrites the index, so it runs once the cards
+        are loaded and when the window closes, not after every answer.
+        """
+        if self.deck is None:
+            return
+        try:
+            self.registry.record_cards(self.deck, self.manager.cards)
+        except OSError as e:
+            print(f"Error updating deck index: {e}")
+
+    def backup_cards(self, records):
+        """Snapshot the saved cards in the background."""
+        key = ("backup", self.backups.directory, CARDS)
+        # A queued snapshot of older data is superseded by this one.
+        self.scheduler.cancel(key)
+        self.scheduler.submit(
+            DISK,
+            key,
+            self.backups.snapshot,
+            CARDS,
+            records,
+            priority=PRIORITY_PREFETCH,
+            on_error=lambda message: print(f"Error backing up cards: {message}"),
+        )
+
     def closeEvent(self, event):
         """Handle window close event."""
+        self.prefetcher.cancel()
+        # Saving merges with the file, so cards not loaded yet are kept.
+        self.scheduler.cancel(("load", self.manager.data_file))
         self.manager.save_cards()
+        self.record_summary()
         self.closed.emit()
         event.accept()
@@ -1,106 +1,718 @@
-import sys
 import os
+import time
+import hashlib
+import threading
 import requests
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
 from json import load
-from gtts import gTTS
-from playsound import playsound
-from googlesearch import search
 
+from src.headwords import headword
+from src.packet import make_packet, make_sense, packet_phonetics
+from src.ratelimit import FAILURE, OVERLOADED, SUCCESS, AdaptiveLimiter
+from src.storage import load_words, resource_path
 
-def get_response(word, version="v2"):
+API_BASE_URL = os.environ.get(
+    "DICTIONARY_API_URL", "https://api.dictionaryapi.dev/api"
+)
+REQUEST_TIMEOUT = 10  # Seconds before an API request is abandoned
+MAX_ATTEMPTS = 3  # Tries per lookup for transient failures
+RETRY_BACKOFF = 0.5  # Seconds before the first retry of a failed lookup
+
+# Shared by every thread talking to the dictionary API.
+API_LIMITER = AdaptiveLimiter()
+
+HEDGE_DELAY = 0.3  # Seconds before a lookup is also sent to the next provider
+STATS_DECAY = 0.2  # Weight of the latest lookup in a provider's running stats
+MIN_AVAILABILITY = 0.05  # Floor when scaling latency by availability
+AUDIO_CACHE_DIR = resource_path("data/audio")
+# Recordings with these endings are tried first, in this order.
+AUDIO_ACCENTS = ("-us.mp3", "-uk.mp3", "-au.mp3")
+
+# Oxford links by word; None records a search that found no link.
+_oxford_cache = {}
+_oxford_lock = threading.Lock()
+
+
+class RetryableError(requests.exceptions.RequestException):
+    """A request failed for a transient reason and may be sent again."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitedError(RetryableError):
+    """The API answered HTTP 429 Too Many Requests."""
+
+
+def parse_retry_after(value, default=1.0):
+    """Convert a Retry-After header (seconds or HTTP date) to seconds."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0.0, moment.timestamp() - time.time())
+
+
+def request_entries(word, version="v2", headers=None, base_url=None, limiter=None):
     """
-    Fetch definition of a word from the Free Dictionary API.
+    Send a lookup to the Free Dictionary API and classify the outcome.
+
+    Requests pass through ``API_LIMITER``, which adapts concurrency and rate
+    to how the server responds.
 
     Args:
         word (str): The word to look up
         version (str): API version (default: 'v2')
+        headers (dict): Extra request headers, e.g. conditional validators
+        base_url (str): API root of a compatible server (default:
+            ``API_BASE_URL``)
+        limiter (AdaptiveLimiter): Limiter for that server (default:
+            ``API_LIMITER``)
 
     Returns:
-        dict: JSON response from the API
+        requests.Response: A 200 response, or 304 for a conditional request
 
     Raises:
-        requests.exceptions.RequestException: If the request fails
+        RateLimitedError: If the API asked us to slow down (HTTP 429)
+        RetryableError: On server errors, timeouts and connection failures
+        requests.exceptions.RequestException: If the request fails otherwise
         ValueError: If the word is not found
     """
-    base_url = "https://api.dictionaryapi.dev/api"
-    url = f"{base_url}/{version}/entries/en/{word}"
+    url = f"{base_url or API_BASE_URL}/{version}/entries/en/{word}"
+    limiter = limiter or API_LIMITER
 
+    limiter.acquire()
+    outcome = OVERLOADED
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        return response.json()
-    except requests.exceptions.HTTPError as e:
+        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            limiter.pause(retry_after)
+            raise RateLimitedError(
+                f"Rate limited, retry after {retry_after:g}s", retry_after
+            )
+        if response.status_code >= 500:
+            # Only 503 says "slow down"; other server errors are just retried.
+            if response.status_code != 503:
+                outcome = FAILURE
+            raise RetryableError(f"HTTP Error: {response.status_code} from {url}")
+        outcome = SUCCESS
         if response.status_code == 404:
             raise ValueError(f"Word '{word}' not found in dictionary")
+        response.raise_for_status()  # Raise an exception for bad status codes
+        return response
+    except RetryableError:
+        raise
+    except requests.exceptions.HTTPError as e:
         raise requests.exceptions.RequestException(f"HTTP Error: {e}")
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+        raise RetryableError(f"Error making request: {e}")
     except requests.exceptions.RequestException as e:
         raise requests.exceptions.RequestException(f"Error making request: {e}")
+    finally:
+        limiter.release(outcome)
 
 
-def get_word_packet(word):
-    packet = []
-    try:
-        result = get_response(word)
-        if result and len(result) > 0:
-            entry = result[0]
-            if "meanings" in entry and len(entry["meanings"]) > 0:
-                meanings = entry["meanings"]
-                for meaning in meanings:
-                    part_of_speech = meaning["partOfSpeech"]
-                    definitions = meaning["definitions"]
-                    for definition in definitions:
-                        d = definition["definition"]
-                        example = definition.get("example")
-                        pack = {
-                            "part_of_speech": part_of_speech,
-                            "definition": d,
-                            "example": example,
-                        }
-                        packet.append(pack)
-    except (ValueError, requests.exceptions.RequestException) as e:
-        print(f"Error: {e}")
-    return packet
+def get_response(word, version="v2", **server):
+    """
+    Fetch definition of a word from the Free Dictionary API.
+
+    Args:
+        word (str): The word to look up
+        version (str): API version (default: 'v2')
+        **server: ``base_url`` and ``limiter``, see ``request_entries``
+
+    Returns:
+        dict: JSON response from the API
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails
+        ValueError: If the word is not found
+    """
+    return request_entries(word, version, **server).json()
+
+
+def get_response_conditional(word, etag=None, last_modified=None):
+    """
+    Re-fetch a word only if it changed since the given validators.
+
+    Returns:
+        tuple: ``(result, validators)``; ``result`` is None when the server
+        answered 304 Not Modified. ``validators`` holds the ETag and
+        Last-Modified values to send next time (empty if not provided).
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    response = request_entries(word, headers=headers)
+    validators = {
+        "etag": response.headers.get("ETag") or etag,
+        "last_modified": response.headers.get("Last-Modified") or last_modified,
+    }
+    if response.status_code == 304:
+        return None, validators
+    return response.json(), validators
+
+
+def parse_word_packet(result):
+    """
+    Convert an API response into a packet.
+
+    Senses of every entry are kept, with their synonyms and antonyms. Those
+    listed for a whole meaning go on its first sense. Phonetics of all
+    entries are kept too, once each; a packet with any is a ``Packet``.
+    """
+    senses = []
+    phonetics = []
+    for entry in result or []:
+        for phonetic in entry.get("phonetics") or []:
+            record = {
+                "text": phonetic.get("text") or "",
+                "audio": phonetic.get("audio") or "",
+            }
+            if record["audio"]:
+                if record not in phonetics:
+                    phonetics.append(record)
+            elif record["text"] and all(
+                p["text"] != record["text"] for p in phonetics
+            ):
+                phonetics.append(record)
+        for meaning in entry.get("meanings") or []:
+            part_of_speech = meaning["partOfSpeech"]
+            synonyms = meaning.get("synonyms") or []
+            antonyms = meaning.get("antonyms") or []
+            for definition in meaning["definitions"]:
+                senses.append(
+                    make_sense(
+                        part_of_speech,
+                        definition["definition"],
+                        definition.get("example"),
+                        _merge(synonyms, definition.get("synonyms")),
+                        _merge(antonyms, definition.get("antonyms")),
+                    )
+                )
+                synonyms = antonyms = []
+    return make_packet(senses, phonetics)
+
+
+def _merge(first, second):
+    """Concatenate two word lists, dropping repeats."""
+    return list(dict.fromkeys([*first, *(second or [])]))
+
+
+class LookupCancelled(Exception):
+    """A provider gave up on a lookup because another one answered first."""
+
+
+class Provider:
+    """
+    A source of word packets for ``ProviderPool``.
+
+    ``lookup`` runs on a pool thread. It is passed a ``threading.Event``
+    that is set once the lookup has been answered elsewhere, and should
+    raise ``LookupCancelled`` instead of doing further work after that.
+    """
+
+    name = "provider"
+
+    def lookup(self, word, cancelled):
+        """
+        Look ``word`` up.
+
+        Returns:
+            list: The packet, empty if the source does not know the word
+
+        Raises:
+            LookupCancelled: If ``cancelled`` was set before an answer
+            Exception: Any other error counts as a failed lookup
+        """
+        raise NotImplementedError
+
+
+class FreeDictionaryProvider(Provider):
+    """
+    The Free Dictionary API, or a server compatible with it.
+
+    Transient failures are retried up to ``attempts`` times in total.
+
+    Args:
+        base_url (str): API root (default: ``API_BASE_URL`` at lookup time)
+        name (str): Name used in provider statistics
+        limiter (AdaptiveLimiter): Limiter for the server (default:
+            ``API_LIMITER``; give other servers their own)
+    """
+
+    def __init__(
+        self, base_url=None, name="freedictionary", limiter=None, attempts=MAX_ATTEMPTS
+    ):
+        self.base_url = base_url
+        self.name = name
+        self.limiter = limiter
+        self.attempts = attempts
+
+    def lookup(self, word, cancelled):
+        for attempt in range(self.attempts):
+            if cancelled.is_set():
+                raise LookupCancelled()
+            try:
+                result = get_response(
+                    word, base_url=self.base_url, limiter=self.limiter
+                )
+                return parse_word_packet(result)
+            except ValueError as e:
+                print(f"Error: {e}")
+                return []
+            except RetryableError as e:
+                if attempt + 1 >= self.attempts:
+                    raise
+                # Rate limits are waited out by the limiter; back off otherwise.
+                if e.retry_after is None and cancelled.wait(
+                    RETRY_BACKOFF * 2**attempt
+                ):
+                    raise LookupCancelled()
+
+
+class OfflineProvider(Provider):
+    """
+    Packets from a local words file, e.g. a dictionary dump or another deck.
+
+    The file is read on the first lookup and kept in memory.
+    """
+
+    def __init__(self, path, name="offline"):
+        self.path = path
+        self.name = name
+        self._words = None
+        self._lock = threading.Lock()
+
+    def lookup(self, word, cancelled):
+        with self._lock:
+            if self._words is None:
+                self._words = load_words(self.path)
+        return self._words.get(word, [])
+
+
+class ProviderStats:
+    """Running latency and availability of one provider."""
+
+    def __init__(self):
+        self.latency = None  # Exponentially weighted, seconds
+        self.availability = 1.0  # Weighted share of lookups without an error
+        self.lookups = 0
+        self.found = 0
+        self.failures = 0
+
+    def record(self, seconds, found=False, failed=False):
+        self.lookups += 1
+        self.found += found
+        self.failures += failed
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += STATS_DECAY * (seconds - self.latency)
+        self.availability += STATS_DECAY * ((not failed) - self.availability)
+
+    def expected_latency(self):
+        """Latency scaled up by the chance of having to look elsewhere."""
+        return (self.latency or 0.0) / max(self.availability, MIN_AVAILABILITY)
+
+    def snapshot(self):
+        return {
+            "latency_ms": round((self.latency or 0.0) * 1000, 1),
+            "availability": round(self.availability, 3),
+            "lookups": self.lookups,
+            "found": self.found,
+            "failures": self.failures,
+        }
+
+
+class ProviderPool:
+    """
+    Looks words up across several providers with hedged requests.
+
+    Providers are tried in order of expected latency. When the current one
+    has not answered within ``hedge_delay`` seconds, or answers without a
+    packet, the next one is started as well. The first non-empty packet wins
+    and the outstanding lookups are cancelled. A ``hedge_delay`` of 0 fans a
+    lookup out to every provider at once.
+
+    Args:
+        providers (list): ``Provider`` objects; ties in ordering keep this order
+        hedge_delay (float): Seconds before the next provider is started
+        max_workers (int): Threads shared by all lookups
+    """
+
+    def __init__(self, providers, hedge_delay=HEDGE_DELAY, max_workers=16):
+        self.providers = list(providers)
+        self.hedge_delay = hedge_delay
+        self.stats = {provider.name: ProviderStats() for provider in self.providers}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="provider"
+        )
+
+    def ordered(self):
+        """Providers, fastest expected answer first."""
+        with self._lock:
+            return sorted(
+                self.providers,
+                key=lambda provider: self.stats[provider.name].expected_latency(),
+            )
+
+    def _run(self, provider, word, cancelled):
+        start = time.monotonic()
+        try:
+            packet = provider.lookup(word, cancelled)
+        except LookupCancelled:
+            raise
+        except Exception:
+            with self._lock:
+                self.stats[provider.name].record(
+                    time.monotonic() - start, failed=True
+                )
+            raise
+        # Answers that lose the race still count: they keep a slow provider
+        # from staying first.
+        with self._lock:
+            self.stats[provider.name].record(
+                time.monotonic() - start, found=bool(packet)
+            )
+        return packet
+
+    def lookup(self, word):
+        """
+        Look ``word`` up, returning the first packet any provider finds.
+
+        Returns:
+            list: The packet, empty if every provider that answered did not
+            know the word
+
+        Raises:
+            Exception: The last error, if every provider failed
+        """
+        order = self.ordered()
+        cancelled = threading.Event()
+        pending = {}
+        errors = []
+        not_found = False
+        started = 0
+        try:
+            while started < len(order) or pending:
+                if started < len(order):
+                    provider = order[started]
+                    started += 1
+                    future = self._executor.submit(
+                        self._run, provider, word, cancelled
+                    )
+                    pending[future] = provider
+                # Hedge once the current providers have had their chance.
+                timeout = self.hedge_delay if started < len(order) else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del pending[future]
+                    try:
+                        packet = future.result()
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    if packet:
+                        return packet
+                    not_found = True
+        finally:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+        if not_found or not errors:
+            return []
+        raise errors[-1]
+
+    def snapshot(self):
+        """Statistics per provider, in current lookup order."""
+        order = self.ordered()
+        with self._lock:
+            return {p.name: self.stats[p.name].snapshot() for p in order}
+
+
+def default_providers():
+    """
+    The Free Dictionary API, mirrors listed in ``DICTIONARY_API_MIRRORS``
+    (comma separated API roots) and the words file named by
+    ``DICTIONARY_OFFLINE_STORE``, if set.
+    """
+    providers = [FreeDictionaryProvider()]
+    mirrors = os.environ.get("DICTIONARY_API_MIRRORS", "")
+    for index, url in enumerate(filter(None, mirrors.split(","))):
+        providers.append(
+            FreeDictionaryProvider(
+                url.strip(), name=f"mirror{index + 1}", limiter=AdaptiveLimiter()
+            )
+        )
+    offline = os.environ.get("DICTIONARY_OFFLINE_STORE")
+    if offline:
+        providers.append(OfflineProvider(offline))
+    return providers
+
+
+PROVIDERS = ProviderPool(default_providers())
+
+
+def get_word_packet(word, pool=None):
+    """
+    Fetch and parse the packet of a word from the configured providers.
+
+    The word is looked up by its ``headword`` spelling.
+
+    Returns:
+        list: The packet (a ``Packet`` when it has phonetics), empty if the
+        word is not in the dictionary
+
+    Raises:
+        requests.exceptions.RequestException: If the lookup keeps failing
+    """
+    return (pool or PROVIDERS).lookup(headword(word))
+
+
+def _unique_headwords(words):
+    seen = set()
+    for word in words:
+        word = headword(word)
+        if word and word not in seen:
+            seen.add(word)
+            yield word
+
+
+def fetch_packets(words, max_workers=None, attempts=MAX_ATTEMPTS, pool=None):
+    """
+    Look up many words in parallel through the provider pool.
+
+    Each word is a hedged ``ProviderPool.lookup``, so batches use mirrors
+    and the offline store and feed the provider statistics like single
+    lookups. Words whose lookup still fails transiently are put back at the
+    end of the queue instead of being dropped, up to ``attempts`` rounds
+    each. Words are looked up by their ``headword`` spelling, and spellings
+    of a word already looked up ("Run", "run ") are skipped.
+
+    Args:
+        words (iterable): Words to look up; consumed lazily
+        max_workers (int): Thread count (default: the limiter's maximum window)
+        attempts (int): Lookup rounds per word before giving up
+        pool (ProviderPool): Providers to use (default: ``PROVIDERS``)
+
+    Yields:
+        tuple: ``(headword, packet, error)`` in completion order. ``packet``
+        is empty for unknown words and None when ``error`` is set.
+    """
+    max_workers = max_workers or API_LIMITER.max_window
+    providers = pool or PROVIDERS
+    words = _unique_headwords(words)
+    tries = {}
+    retry = deque()
+    pending = {}
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def fill():
+            nonlocal exhausted
+            while len(pending) < max_workers * 2:
+                if retry:
+                    word = retry.popleft()
+                elif not exhausted:
+                    word = next(words, None)
+                    if word is None:
+                        exhausted = True
+                        continue
+                else:
+                    return
+                pending[executor.submit(providers.lookup, word)] = word
+
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                word = pending.pop(future)
+                try:
+                    packet = future.result()
+                except RetryableError as e:
+                    tries[word] = tries.get(word, 0) + 1
+                    if tries[word] < attempts:
+                        retry.append(word)
+                    else:
+                        yield word, None, e
+                except Exception as e:
+                    yield word, None, e
+                else:
+                    yield word, packet, None
+            fill()
 
 
-def play_word(word):
-    # Convert the word to speech
-    tts = gTTS(text=word, lang="en")
-    temp_file = "temp_audio.mp3"
-    tts.save(temp_file)
+def audio_cache_path(word):
+    """Return the cache file used for the synthesized pronunciation of ``word``."""
+    digest = hashlib.sha1(word.encode("utf-8")).hexdigest()
+    return os.path.join(AUDIO_CACHE_DIR, f"{digest}.mp3")
 
-    # Play the audio file
-    playsound(temp_file)
 
-    # Optionally, remove the file after playing
-    os.remove(temp_file)
+def recording_cache_path(word):
+    """Return the cache file used for the API's recording of ``word``."""
+    digest = hashlib.sha1(word.encode("utf-8")).hexdigest()
+    return os.path.join(AUDIO_CACHE_DIR, f"{digest}.api.mp3")
 
 
-def resource_path(relative_path):
-    """Get absolute path to resource, works for dev and for PyInstaller"""
+def audio_urls(packet):
+    """Recording URLs stored with a packet, preferred accents first."""
+    urls = [p["audio"] for p in packet_phonetics(packet) if p.get("audio")]
+    return sorted(urls, key=_accent_rank)
+
+
+def _accent_rank(url):
+    for rank, suffix in enumerate(AUDIO_ACCENTS):
+        if url.endswith(suffix):
+            return rank
+    return len(AUDIO_ACCENTS)
+
+
+def is_audio_cached(word, urls=()):
+    """Whether ``pronunciation(word, urls)`` would not need the network."""
+    if os.path.exists(recording_cache_path(word)):
+        return True
+    # A recording that can be downloaded is preferred over synthesized speech.
+    return not urls and os.path.exists(audio_cache_path(word))
+
+
+def _write_audio(path, write):
+    """Create ``path`` through ``write(temp_path)`` without exposing partial files."""
+    os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+    # Write under a unique name first so a concurrent prefetch and playback
+    # never see a half written file.
+    temp_file = f"{path}.{threading.get_ident()}.tmp"
     try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path).replace("\\", "/")
+        write(temp_file)
+        os.replace(temp_file, path)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    return path
+
+
+def download_recording(word, urls):
+    """
+    Download the first available recording of ``word``, reusing the cache.
+
+    Returns:
+        str: Path to the mp3 file, or None if no URL could be fetched
+    """
+    path = recording_cache_path(word)
+    if os.path.exists(path):
+        return path
+    for url in urls:
+        try:
+            response = requests.get(url, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Error downloading audio for '{word}': {e}")
+            continue
+        if not response.content:
+            continue
+
+        def write(temp_file, content=response.content):
+            with open(temp_file, "wb") as f:
+                f.write(content)
+
+        return _write_audio(path, write)
+    return None
+
+
+def synthesize_word(word):
+    """
+    Synthesize the pronunciation of a word, reusing the on-disk cache.
+
+    Returns:
+        str: Path to the mp3 file
+    """
+    path = audio_cache_path(word)
+    if os.path.exists(path):
+        return path
+
+    # Imported lazily so that headless tools do not pay for audio support.
+    from gtts import gTTS
+
+    return _write_audio(
+        path, lambda temp_file: gTTS(text=word, lang="en").save(temp_file)
+    )
+
+
+def pronunciation(word, urls=()):
+    """
+    Return an mp3 of the pronunciation of ``word``.
+
+    A cached or downloadable recording from the API is preferred; speech is
+    only synthesized when there is none.
+
+    Args:
+        word (str): The word
+        urls (list): Recording URLs, see ``audio_urls``
+
+    Returns:
+        str: Path to the mp3 file
+    """
+    path = recording_cache_path(word)
+    if os.path.exists(path):
+        return path
+    return download_recording(word, urls) or synthesize_word(word)
+
+
+def play_audio(path):
+    """Play an mp3 file, blocking until it has finished."""
+    from playsound import playsound
+
+    playsound(path)
+
+
+def play_word(word, urls=()):
+    play_audio(pronunciation(word, urls))
+
+
+def cached_oxford_link(word):
+    """Return ``(found, link)`` from the Oxford search cache."""
+    with _oxford_lock:
+        if word in _oxford_cache:
+            return True, _oxford_cache[word]
+    return False, None
 
 
 def search_oxford_dictionary(word):
+    found, link = cached_oxford_link(word)
+    if found:
+        return link
+
+    from googlesearch import search
+
     try:
         query = f"{word} oxford dictionary"
         results = search(query, num_results=1)
         first_link = next(
             (r for r in results if "oxfordlearnersdictionaries" in r), None
         )
-
-        if first_link:
-            return first_link
-        else:
-            return None
     except Exception as e:
+        # Failures are not cached so that the next click retries.
         print(f"Error: {e}")
         return None
 
+    with _oxford_lock:
+        _oxford_cache[word] = first_link
+    return first_link
+
 
 def get_stylesheet(mode):
     with open(resource_path("resources/style/style.qss"), "r") as f:
@@ -0,0 +1,402 @@
+"""
+Incremental, deduplicated snapshots of the word and card stores.
+
+Entries are spread over a fixed number of buckets by a hash of their key.
+Each bucket is stored once as a content-addressed object (named by the hash
+of its contents): a line of entry keys and content hashes, followed by one
+line per value. A snapshot is a small manifest listing the bucket hashes of
+each file, so saving after an edit writes only the buckets that edit
+touched, and any number of snapshots share everything they have in common.
+
+Change detection happens in memory: a ``SnapshotStore`` remembers the value
+and hash of every entry it saw last, so later snapshots only encode entries
+that are new or differ. Diffs compare bucket hashes first and per-entry
+hashes only in buckets that differ; values are decoded only on restore.
+
+Layout, next to the data files (``data/backups/`` for the default deck)::
+
+    objects/ab/cdef...   zlib compressed buckets
+    snapshots/<id>.json  manifests
+    index.json           one line of summary per snapshot, for listing
+
+Kept free of Qt imports so that the command-line tools can use it.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+
+from src.packet import json_default, sense_hook
+from src.serializers import orjson
+from src.storage import SharedStore, locked, read_data
+
+BACKUP_DIR = "backups"
+BUCKETS = 256  # Fixed, so an entry always lands in the same bucket
+KEEP_SNAPSHOTS = 200  # Snapshots kept when pruning
+PRUNE_SLACK = 20  # Extra snapshots allowed before a prune runs
+PRUNE_GRACE = 600  # Seconds an unreferenced object is kept after writing
+COMPRESS_LEVEL = 1
+
+WORDS = "words"
+CARDS = "cards"
+
+
+def backup_dir(data_path):
+    """Backup directory for the deck holding ``data_path``."""
+    return os.path.join(os.path.dirname(data_path), BACKUP_DIR)
+
+
+def bucket_of(key):
+    return zlib.crc32(key.encode("utf-8")) % BUCKETS
+
+
+def digest(raw):
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def encode_value(value):
+    """Canonical encoding of an entry, the input of its content hash."""
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(
+        value,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=json_default,
+    ).encode("utf-8")
+
+
+class SnapshotStore:
+    """
+    Snapshots of the data files of one deck.
+
+    Args:
+        directory (str): Backup directory, see ``backup_dir``
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        self.snapshots_dir = os.path.join(directory, "snapshots")
+        self.index_path = os.path.join(directory, "index.json")
+        # Per file label: entries as {key: (value, hash)}, bucket contents as
+        # {key: hash} and the hash of each bucket, as of the last snapshot.
+        self._entries = {}
+        self._buckets = {}
+        self._bucket_hashes = {}
+
+    # Objects
+
+    def _object_path(self, name):
+        return os.path.join(self.objects_dir, name[:2], name[2:])
+
+    def _put(self, raw):
+        """Store ``raw`` unless already present; returns ``(name, size)``."""
+        name = digest(raw)
+        path = self._object_path(name)
+        if os.path.exists(path):
+            return name, 0
+        compressed = zlib.compress(raw, COMPRESS_LEVEL)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(compressed)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name, len(compressed)
+
+    def _get(self, name):
+        with open(self._object_path(name), "rb") as file:
+            return zlib.decompress(file.read())
+
+    def _read_bucket(self, name, values=False):
+        """
+        Decode a bucket.
+
+        Returns:
+            dict: ``{key: hash}``, or ``{key: value}`` when ``values`` is set
+        """
+        header, *lines = self._get(name).split(b"\n")
+        rows = json.loads(header)
+        if values:
+            return {
+                key: json.loads(line, object_hook=sense_hook)
+                for (key, _), line in zip(rows, lines)
+            }
+        return dict(rows)
+
+    # Snapshots
+
+    def _state(self, label):
+        if label not in self._entries:
+            self._entries[label] = {}
+            self._buckets[label] = [{} for _ in range(BUCKETS)]
+            self._bucket_hashes[label] = [None] * BUCKETS
+        return (
+            self._entries[label],
+            self._buckets[label],
+            self._bucket_hashes[label],
+        )
+
+    def _update_tree(self, label, data):
+        """
+        Bring the in-memory tree of ``label`` up to date with ``data``.
+
+        Returns:
+            int: Compressed bytes of new objects written
+        """
+        entries, buckets, bucket_hashes = self._state(label)
+        # Buckets never written, or pruned since, are written out again.
+        dirty = {
+            index
+            for index, name in enumerate(bucket_hashes)
+            if name is None or not os.path.exists(self._object_path(name))
+        }
+        encoded = {}  # Entries encoded in this pass, reused for their buckets
+        for key, value in data.items():
+            seen = entries.get(key)
+            if seen is not None and (seen[0] is value or seen[0] == value):
+                continue
+            raw = encoded[key] = encode_value(value)
+            entry_hash = digest(raw)
+            entries[key] = (value, entry_hash)
+            bucket = buckets[bucket_of(key)]
+            if bucket.get(key) != entry_hash:
+                bucket[key] = entry_hash
+                dirty.add(bucket_of(key))
+        if len(entries) > len(data):
+            for key in entries.keys() - data.keys():
+                del entries[key]
+                index = bucket_of(key)
+                del buckets[index][key]
+                dirty.add(index)
+
+        written = 0
+        for index in dirty:
+            # A header line of [key, hash] pairs, then one line per value, so
+            # diffs need not decode any values.
+            rows = sorted(buckets[index].items())
+            lines = [json.dumps(rows, separators=(",", ":")).encode("utf-8")]
+            lines.extend(encoded.get(key) or encode_value(data[key]) for key, _ in rows)
+            bucket_hashes[index], size = self._put(b"\n".join(lines))
+            written += size
+        return written
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _write_json(self, path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(value, f, separators=(",", ":"))
+        os.replace(temp_path, path)
+
+    def _manifest_path(self, snapshot_id):
+        return os.path.join(self.snapshots_dir, f"{snapshot_id}.json")
+
+    def manifest(self, snapshot_id):
+        """Return a snapshot's manifest, with the bucket hashes of each file."""
+        with open(self._manifest_path(snapshot_id), "r") as f:
+            return json.load(f)
+
+    def _commit(self, files, source, written=0):
+        """
+        Record a snapshot of ``files`` on top of the latest one.
+
+        Files not in ``files`` keep the state of the latest snapshot, which
+        may have been taken by another window or process.
+
+        Returns:
+            dict: The index entry, or None if nothing changed
+        """
+        with locked(self.index_path):
+            index = self._read_index()
+            previous = self.manifest(index[-1]["id"])["files"] if index else {}
+            if all(previous.get(label) == tree for label, tree in files.items()):
+                return None
+            merged = dict(previous)
+            merged.update(files)
+            entry = {
+                "id": index[-1]["id"] + 1 if index else 1,
+                "created": time.time(),
+                "source": source,
+                "counts": {label: tree["count"] for label, tree in merged.items()},
+                "bytes": written,
+            }
+            self._write_json(
+                self._manifest_path(entry["id"]), {**entry, "files": merged}
+            )
+            index.append(entry)
+            self._write_json(self.index_path, index)
+            if len(index) > KEEP_SNAPSHOTS + PRUNE_SLACK:
+                self._prune(index, KEEP_SNAPSHOTS)
+        return entry
+
+    def snapshot(self, label, data, source=None):
+        """
+        Snapshot the current contents of one file.
+
+        Only entries that changed since this store's previous snapshot are
+        encoded, and only the buckets holding them are written. Safe to call
+        on a worker thread as long as ``data`` is not modified meanwhile.
+
+        Args:
+            label (str): File being saved, e.g. WORDS or CARDS
+            data (dict): Its complete mapping
+            source (str): Why the snapshot was taken (default: ``label``)
+
+        Returns:
+            dict: The index entry, or None if nothing changed
+        """
+        written = self._update_tree(label, data)
+        tree = {"count": len(data), "buckets": list(self._bucket_hashes[label])}
+        return self._commit({label: tree}, source or label, written)
+
+    def snapshot_files(self, paths, source="manual"):
+        """Snapshot data files as they are on disk; ``paths`` maps labels to paths."""
+        files = {}
+        written = 0
+        for label, path in paths.items():
+            data = read_data(path) if os.path.exists(path) else {}
+            written += self._update_tree(label, data)
+            files[label] = {
+                "count": len(data),
+                "buckets": list(self._bucket_hashes[label]),
+            }
+        return self._commit(files, source, written)
+
+    # Listing, diffing and restoring
+
+    def snapshots(self):
+        """Return the index entries of all snapshots, oldest first."""
+        return self._read_index()
+
+    def at(self, moment):
+        """
+        Return the id of the last snapshot taken at or before ``moment``.
+
+        Args:
+            moment (datetime.datetime): Point in time, local time if naive
+        """
+        timestamp = moment.timestamp()
+        found = None
+        for entry in self._read_index():
+            if entry["created"] <= timestamp:
+                found = entry["id"]
+        return found
+
+    def diff(self, old_id, new_id, label):
+        """
+        Compare one file between two snapshots.
+
+        Returns:
+            tuple: Sorted ``(added, changed, removed)`` lists of keys
+        """
+        old = self.manifest(old_id)["files"].get(label, {"buckets": []})["buckets"]
+        new = self.manifest(new_id)["files"].get(label, {"buckets": []})["buckets"]
+        added, changed, removed = [], [], []
+        for index in range(max(len(old), len(new))):
+            old_name = old[index] if index < len(old) else None
+            new_name = new[index] if index < len(new) else None
+            if old_name == new_name:
+                continue
+            before = self._read_bucket(old_name) if old_name else {}
+            after = self._read_bucket(new_name) if new_name else {}
+            for key, entry_hash in after.items():
+                if key not in before:
+                    added.append(key)
+                elif before[key] != entry_hash:
+                    changed.append(key)
+            removed.extend(key for key in before if key not in after)
+        return sorted(added), sorted(changed), sorted(removed)
+
+    def read(self, snapshot_id, label):
+        """Return the full mapping of one file as of a snapshot."""
+        tree = self.manifest(snapshot_id)["files"].get(label)
+        data = {}
+        if tree is not None:
+            for name in tree["buckets"]:
+                data.update(self._read_bucket(name, values=True))
+        return data
+
+    def restore(self, snapshot_id, paths):
+        """
+        Restore files to their state in a snapshot.
+
+        The current files are snapshotted first, so a restore can itself be
+        undone. Files are replaced atomically under the usual write lock;
+        open windows pick the change up like any other external edit.
+
+        Args:
+            snapshot_id (int): Snapshot to restore
+            paths (dict): Labels of the files to restore mapped to their paths
+
+        Raises:
+            KeyError: If the snapshot does not hold one of the files
+        """
+        files = self.manifest(snapshot_id)["files"]
+        missing = set(paths) - set(files)
+        if missing:
+            raise KeyError(f"Snapshot {snapshot_id} has no {', '.join(missing)}")
+        self.snapshot_files(paths, source="before restore")
+        for label, path in paths.items():
+            SharedStore(path).write(self.read(snapshot_id, label))
+            # The in-memory tree no longer matches the file.
+            for state in (self._entries, self._buckets, self._bucket_hashes):
+                state.pop(label, None)
+        self._commit(
+            {label: files[label] for label in paths}, f"restore {snapshot_id}"
+        )
+
+    def prune(self, keep=KEEP_SNAPSHOTS):
+        """Delete all but the newest ``keep`` snapshots and unused objects."""
+        with locked(self.index_path):
+            self._prune(self._read_index(), keep)
+
+    def _prune(self, index, keep):
+        if len(index) <= keep:
+            return
+        dropped, kept = index[: len(index) - keep], index[len(index) - keep :]
+        self._write_json(self.index_path, kept)
+        for entry in dropped:
+            try:
+                os.remove(self._manifest_path(entry["id"]))
+            except FileNotFoundError:
+                pass
+        live = set()
+        for entry in kept:
+            for tree in self.manifest(entry["id"])["files"].values():
+                live.update(tree["buckets"])
+        # Trees cached in memory may be committed next; keep their buckets.
+        for bucket_hashes in self._bucket_hashes.values():
+            live.update(name for name in bucket_hashes if name)
+        if not os.path.isdir(self.objects_dir):
+            return
+        # Objects written recently may belong to a snapshot another process
+        # is about to commit.
+        cutoff = time.time() - PRUNE_GRACE
+        for prefix in os.listdir(self.objects_dir):
+            directory = os.path.join(self.objects_dir, prefix)
+            for rest in os.listdir(directory):
+                path = os.path.join(directory, rest)
+                if prefix + rest not in live and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+
+
+def format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,410 @@
+"""
+Flashcards and the SM-2 spaced repetition scheduler.
+
+Kept free of Qt so that the review data can be used by headless tools; the
+review window lives in ``src.anki``.
+"""
+
+import json
+import datetime
+import random
+import os
+
+from src import serializers
+from src.packet import compact_packet, make_packet, packet_phonetics
+from src.storage import LOAD_CHUNK, SharedStore, chunked, resource_path
+
+
+# SM-2 constants; a deck may override them with fitted values, see
+# src/optimizer.py.
+DEFAULT_PARAMETERS = {
+    "initial_ease": 2.5,  # Ease factor of a new card
+    "first_interval": 1,  # Days after the first successful review
+    "second_interval": 3,  # Days after the second successful review
+    "min_ease": 1.3,  # Floor for the ease factor
+    "interval_modifier": 1.0,  # Scales every later interval
+}
+PARAMETERS_FILE = "scheduler_params.json"
+REVIEW_LOG_FILE = "reviews.log"
+
+DEFINITION_HTML = "<p><b>{}. ({})</b> {}</p>"
+EXAMPLE_HTML = "<p><i>Example:</i> {}</p>"
+
+
+def format_definitions(definitions):
+    """Format a packet's definitions as rich text for display."""
+    parts = []
+    for i, definition_dict in enumerate(definitions, 1):
+        parts.append(
+            DEFINITION_HTML.format(
+                i, definition_dict["part_of_speech"], definition_dict["definition"]
+            )
+        )
+        example = definition_dict["example"]
+        if example and example != "null":
+            parts.append(EXAMPLE_HTML.format(example))
+    return "".join(parts)
+
+
+def schedule(
+    quality, repetitions, interval, ease_factor, parameters=DEFAULT_PARAMETERS
+):
+    """
+    Apply one SM-2 review to a card's scheduling state.
+
+    Returns:
+        tuple: The new ``(repetitions, interval, ease_factor)``
+    """
+    if quality < 3:
+        # Failed, reset
+        return 0, 0, ease_factor
+
+    # Correct response
+    if repetitions == 0:
+        interval = parameters["first_interval"]
+    elif repetitions == 1:
+        interval = parameters["second_interval"]
+    else:
+        interval = round(interval * ease_factor * parameters["interval_modifier"])
+
+    # Update ease factor (SM-2 algorithm)
+    ease_factor += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    ease_factor = max(ease_factor, parameters["min_ease"])
+    return repetitions + 1, interval, ease_factor
+
+
+def append_review(path, day, word, quality, elapsed, state):
+    """
+    Append one review to a review log.
+
+    Each line holds the date, word, quality (0-5), the days elapsed since
+    the previous review of the word (-1 for its first review) and the card's
+    repetitions, interval and ease factor before the review, separated by
+    tabs. That is enough to replay the card's history under any parameters,
+    including cards that were already scheduled when logging started.
+    """
+    word = word.replace("\t", " ").replace("\n", " ")
+    repetitions, interval, ease_factor = state
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(
+            f"{day:%Y-%m-%d}\t{word}\t{quality}\t{elapsed}"
+            f"\t{repetitions}\t{interval}\t{ease_factor:.4f}\n"
+        )
+
+
+def read_reviews(path):
+    """
+    Yield ``(date, word, quality, elapsed, state)`` tuples from a review log.
+
+    ``state`` is the ``(repetitions, interval, ease_factor)`` before the
+    review, or None for lines written before it was logged.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) == 4:
+                day, word, quality, elapsed = fields
+                state = None
+            elif len(fields) == 7:
+                day, word, quality, elapsed, repetitions, interval, ease = fields
+                state = (int(repetitions), int(interval), float(ease))
+            else:
+                continue
+            yield day, word, int(quality), int(elapsed), state
+
+
+class Card:
+    """Represents a flashcard with spaced repetition data."""
+
+    def __init__(
+        self, word, definitions, ease_factor=DEFAULT_PARAMETERS["initial_ease"]
+    ):
+        self.word = word
+        self._html = None  # Rendered definitions, see get_formatted_definitions
+        self.definitions = definitions
+        self.ease_factor = ease_factor  # Initial ease factor (SM-2 algorithm)
+        self.interval = 0  # Days between reviews
+        self.repetitions = 0  # Number of successful reviews
+        self.next_review = datetime.datetime.now().date()
+        self.last_review = None
+
+    def process_response(self, quality, parameters=DEFAULT_PARAMETERS):
+        """
+        Update card based on response quality (0-5):
+        0-2: Incorrect (start over)
+        3: Correct but difficult
+        4: Correct
+        5: Correct and easy
+        """
+        self.last_review = datetime.datetime.now().date()
+        self.repetitions, self.interval, self.ease_factor = schedule(
+            quality, self.repetitions, self.interval, self.ease_factor, parameters
+        )
+
+        # Set next review date
+        self.next_review = datetime.datetime.now().date() + datetime.timedelta(
+            days=self.interval
+        )
+
+        return self.interval
+
+    def to_record(self):
+        """Return the card's state as stored in flashcards.json."""
+        return {
+            "definitions": self.definitions,
+            "ease_factor": self.ease_factor,
+            "interval": self.interval,
+            "repetitions": self.repetitions,
+            "next_review": self.next_review.strftime("%Y-%m-%d"),
+            "last_review": (
+                self.last_review.strftime("%Y-%m-%d") if self.last_review else None
+            ),
+        }
+
+    @classmethod
+    def from_record(cls, word, record):
+        """Build a card from its flashcards.json record."""
+        card = cls(word, record["definitions"], record["ease_factor"])
+        card.interval = record["interval"]
+        card.repetitions = record["repetitions"]
+        card.next_review = datetime.datetime.strptime(
+            record["next_review"], "%Y-%m-%d"
+        ).date()
+        if record.get("last_review"):
+            card.last_review = datetime.datetime.strptime(
+                record["last_review"], "%Y-%m-%d"
+            ).date()
+        return card
+
+    def is_due(self):
+        """Check if card is due for review."""
+        return self.next_review <= datetime.datetime.now().date()
+
+    @property
+    def definitions(self):
+        return self._definitions
+
+    @definitions.setter
+    def definitions(self, definitions):
+        # Assign a new list rather than mutating it so the cache is dropped.
+        # Phonetics are kept so the card's recordings can be played.
+        self._definitions = make_packet(
+            compact_packet(definitions), packet_phonetics(definitions)
+        )
+        self._html = None
+
+    def get_formatted_definitions(self):
+        """Format all definitions for display, rendering only once."""
+        if self._html is None:
+            self._html = format_definitions(self._definitions)
+        return self._html
+
+
+class FlashcardManager:
+    """Manages the flashcard collection and spaced repetition system."""
+
+    def __init__(self, data_file=None):
+        self.cards = {}
+        self.current_card = None
+        self.due_cards = []
+        self.data_file = data_file or resource_path("data/flashcards.json")
+        self.dirty = set()  # Words changed since the last save
+        self._store = None
+        self.on_saved = None  # Called with the saved records after each save
+        self.parameters = dict(DEFAULT_PARAMETERS)
+        self.stats = {"learned": 0, "reviewing": 0, "new": 0}
+
+    @property
+    def review_log(self):
+        """Path of the review log kept next to the cards file."""
+        return os.path.join(os.path.dirname(self.data_file), REVIEW_LOG_FILE)
+
+    def load_parameters(self):
+        """Use fitted scheduler parameters for this deck if there are any."""
+        path = os.path.join(os.path.dirname(self.data_file), PARAMETERS_FILE)
+        self.parameters = dict(DEFAULT_PARAMETERS)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                fitted = json.load(f).get("parameters", {})
+            self.parameters.update(
+                {k: v for k, v in fitted.items() if k in DEFAULT_PARAMETERS}
+            )
+
+    @property
+    def store(self):
+        """Shared store for ``data_file``; follows reassignments of the path."""
+        if self._store is None or self._store.path != self.data_file:
+            self._store = SharedStore(self.data_file)
+        return self._store
+
+    def load_cards(self, initial_data_file=resource_path("data/words.json")):
+        """Load cards from JSON file or create from initial data."""
+        try:
+            self.load_parameters()
+            for cards, created in self.stream_cards(initial_data_file):
+                self.add_cards(cards, created)
+            self.finish_loading()
+        except Exception as e:
+            print(f"Error loading cards: {e}")
+            return False
+        return True
+
+    def stream_cards(self, initial_data_file, chunk_size=LOAD_CHUNK):
+        """
+        Parse the cards file piecewise, without touching the manager's cards.
+
+        Safe to run on a worker thread; hand each chunk to ``add_cards`` on
+        the owning thread and call ``finish_loading`` at the end.
+        ``load_parameters`` must have been called first.
+
+        Yields:
+            tuple: ``(cards, created)`` - a dict of cards, and whether they
+            were created from ``initial_data_file`` rather than loaded
+        """
+        if os.path.exists(self.data_file):
+            for chunk in chunked(self.store.stream(), chunk_size):
+                cards = {
+                    word: Card.from_record(word, record)
+                    for word, record in chunk.items()
+                }
+                yield cards, False
+        elif os.path.exists(initial_data_file):
+            ease = self.parameters["initial_ease"]
+            with open(initial_data_file, "rb") as f:
+                for chunk in chunked(serializers.iter_items(f), chunk_size):
+                    cards = {
+                        word: Card(word, definitions, ease)
+                        for word, definitions in chunk.items()
+                    }
+                    yield cards, True
+
+    def add_cards(self, cards, created=False):
+        """Add streamed cards, keeping any the manager already has."""
+        new_cards = {
+            word: card for word, card in cards.items() if word not in self.cards
+        }
+        self.cards.update(new_cards)
+        if created:
+            # None of these exist on disk yet.
+            self.dirty.update(new_cards)
+        self.due_cards.extend(card for card in new_cards.values() if card.is_due())
+
+    def finish_loading(self):
+        """Mark the cards as complete once every chunk has been added."""
+        self.store.loaded = True
+        random.shuffle(self.due_cards)
+        self.update_stats()
+
+    def save_cards(self):
+        """Save cards to JSON file, merging reviews saved by other windows."""
+        # Saving to another file replaces it rather than merging into it.
+        retargeted = self._store is not None and self._store.path != self.data_file
+        try:
+            data = {word: card.to_record() for word, card in self.cards.items()}
+            changed, removed = self.store.write(
+                data, None if retargeted else self.dirty
+            )
+            self.dirty.clear()
+        except Exception as e:
+            print(f"Error saving cards: {e}")
+            return False
+        self.apply_changes(changed, removed)
+        if self.on_saved is not None:
+            data.update(changed)
+            for word in removed:
+                data.pop(word, None)
+            self.on_saved(data)
+        return True
+
+    def poll_arguments(self):
+        """
+        Copies of the cards and unsaved words for ``store.read_changes``.
+
+        Returns:
+            tuple: ``(records, dirty)``
+        """
+        data = {word: card.to_record() for word, card in self.cards.items()}
+        return data, set(self.dirty)
+
+    def apply_polled(self, since, result):
+        """
+        Apply the result of ``store.read_changes``.
+
+        Returns:
+            bool: Whether any card changed
+        """
+        signature, changed, removed = result
+        if not self.store.accept(since, signature):
+            return False
+        # Cards answered since the copy was taken keep the local state.
+        changed = {w: r for w, r in changed.items() if w not in self.dirty}
+        return self.apply_changes(changed, removed - self.dirty)
+
+    def apply_changes(self, changed, removed):
+        """Apply external card changes, keeping the review queue in order."""
+        if not changed and not removed:
+            return False
+        for word, record in changed.items():
+            self.cards[word] = Card.from_record(word, record)
+        for word in removed:
+            self.cards.pop(word, None)
+        # Cards reviewed elsewhere drop out of the queue.
+        self.due_cards = [
+            self.cards[card.word]
+            for card in self.due_cards
+            if card.word in self.cards and self.cards[card.word].is_due()
+        ]
+        self.update_stats()
+        return True
+
+    def update_due_cards(self):
+        """Update the list of cards due for review."""
+        self.due_cards = [card for card in self.cards.values() if card.is_due()]
+        random.shuffle(self.due_cards)
+
+    def get_next_card(self):
+        """Get the next card due for review."""
+        if not self.due_cards:
+            self.update_due_cards()
+            if not self.due_cards:
+                return None
+
+        if self.due_cards:
+            self.current_card = self.due_cards.pop(0)
+            return self.current_card
+        return None
+
+    def process_response(self, quality):
+        """Process response for current card."""
+        if self.current_card:
+            card = self.current_card
+            today = datetime.datetime.now().date()
+            elapsed = (today - card.last_review).days if card.last_review else -1
+            state = (card.repetitions, card.interval, card.ease_factor)
+            interval = card.process_response(quality, self.parameters)
+            self.dirty.add(card.word)
+            try:
+                append_review(
+                    self.review_log, today, card.word, quality, elapsed, state
+                )
+            except OSError as e:
+                print(f"Error logging review: {e}")
+            self.save_cards()
+            self.update_stats()
+            return interval
+        return 0
+
+    def update_stats(self):
+        """Update statistics about card status."""
+        today = datetime.datetime.now().date()
+        self.stats = {"learned": 0, "reviewing": 0, "new": 0}
+
+        for card in self.cards.values():
+            if card.repetitions == 0:
+                self.stats["new"] += 1
+            elif card.interval >= 21:  # Considered "learned" if interval is 21+ days
+                self.stats["learned"] += 1
+            else:
+                self.stats["reviewing"] += 1
+
+        return self.stats
@@ -0,0 +1,391 @@
+"""
+Headless command-line interface for the dictionary.
+
+Looks up, adds, removes and exports words using ``src.backend`` and the
+storage layer without importing PyQt6, so it starts quickly and can be used
+in pipelines. Results are streamed as JSON lines on stdout.
+
+Usage (from the repository root):
+    python -m src.cli lookup pristine serene
+    cat words.txt | python -m src.cli add --jobs 8
+    python -m src.cli remove pristine
+    python -m src.cli export > words.jsonl
+    python -m src.cli export --source cards --format anki -o deck.txt
+    python -m src.cli --deck French add bonjour
+    python -m src.cli decks
+    python -m src.cli backups list
+    python -m src.cli backups diff 3 7
+    python -m src.cli backups restore --at "2026-10-19 09:00"
+"""
+
+import argparse
+import datetime
+import json
+import sys
+
+from src.decks import DEFAULT_DECK, DeckRegistry
+from src.headwords import HeadwordIndex, headword
+from src.packet import json_default
+from src.storage import SharedStore, load_words
+
+
+def iter_words(args):
+    """Yield words from the positional arguments, ``--file`` options or stdin."""
+    yield from args.words
+    files = list(args.file)
+    if not args.words and not files:
+        files = ["-"]
+    for path in files:
+        stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+        try:
+            for line in stream:
+                word = line.strip()
+                if word:
+                    yield word
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def emit(record, out=None):
+    out = out or sys.stdout
+    out.write(json.dumps(record, ensure_ascii=False, default=json_default) + "\n")
+    out.flush()
+
+
+def save_deck_words(args, store, words_data, dirty):
+    # Merge with words another instance saved while we were fetching.
+    changed, removed = store.write(words_data, dirty)
+    words_data.update(changed)
+    for word in removed:
+        words_data.pop(word, None)
+    if args.deck is not None:
+        args.registry.record_words(args.deck, words_data)
+
+
+def fetch_all(words, jobs):
+    # Imported on first use: the HTTP stack dominates start-up time otherwise.
+    from src.backend import fetch_packets
+
+    return fetch_packets(words, max_workers=jobs)
+
+
+def cmd_lookup(args):
+    words_data = {} if args.fetch else load_words(args.data)
+    index = HeadwordIndex(words_data)
+
+    def misses():
+        for word in iter_words(args):
+            stored = index.resolve(word, lemmas=args.lemmas)
+            if stored is not None:
+                emit(
+                    {
+                        "word": word,
+                        "headword": stored,
+                        "source": "store",
+                        "packet": words_data[stored],
+                    }
+                )
+            else:
+                yield word
+
+    status = 0
+    for word, packet, error in fetch_all(misses(), args.jobs):
+        if error is not None:
+            emit({"word": word, "error": str(error)})
+            status = 1
+        elif packet:
+            emit({"word": word, "source": "api", "packet": packet})
+        else:
+            emit({"word": word, "error": "not found"})
+            status = 1
+    return status
+
+
+def cmd_add(args):
+    store = SharedStore(args.data)
+    words_data = store.read()
+    index = HeadwordIndex(words_data)
+    lemmas = args.lemmas
+    status = 0
+    added = set()
+
+    def pending(words, fetching, waiting):
+        for word in words:
+            stored = index.resolve(word, lemmas)
+            if stored is not None:
+                emit({"word": word, "status": "duplicate", "headword": stored})
+                continue
+            target = fetching.resolve(word, lemmas)
+            if target is not None:
+                waiting.setdefault(target, []).append(word)
+                continue
+            fetching.add(headword(word))
+            yield word
+
+    words = iter_words(args)
+    try:
+        while words:
+            # Later input referring to a word being fetched only counts as a
+            # duplicate once that fetch succeeds; otherwise it is looked up in
+            # a further round.
+            waiting = {}  # Headword being fetched -> input waiting on it
+            retry = []
+            batch = pending(words, HeadwordIndex(), waiting)
+            for word, packet, error in fetch_all(batch, args.jobs):
+                followers = waiting.pop(word, [])
+                if error is not None:
+                    emit({"word": word, "status": "error", "error": str(error)})
+                    status = 1
+                    retry.extend(followers)
+                elif not packet:
+                    emit({"word": word, "status": "not found"})
+                    status = 1
+                    retry.extend(followers)
+                else:
+                    words_data[word] = packet
+                    index.add(word)
+                    added.add(word)
+                    emit({"word": word, "status": "added", "senses": len(packet)})
+                    for follower in followers:
+                        emit(
+                            {"word": follower, "status": "duplicate", "headword": word}
+                        )
+            words = retry
+    finally:
+        if added:
+            save_deck_words(args, store, words_data, added)
+    return status
+
+
+def cmd_remove(args):
+    store = SharedStore(args.data)
+    words_data = store.read()
+    index = HeadwordIndex(words_data)
+    removed = set()
+    status = 0
+    for word in iter_words(args):
+        # Only other spellings, never a lemma: "runs" must not remove "run".
+        stored = index.resolve(word, lemmas=False)
+        if stored is None:
+            emit({"word": word, "status": "missing"})
+            status = 1
+        else:
+            del words_data[stored]
+            index.discard(stored)
+            removed.add(stored)
+            emit({"word": stored, "status": "removed"})
+    if removed:
+        save_deck_words(args, store, words_data, removed)
+    return status
+
+
+def cmd_export(args):
+    from src.export import export_cards, export_words, open_output
+
+    out = open_output(args.output)
+    try:
+        if args.source == "cards":
+            from src.cards import FlashcardManager
+
+            manager = FlashcardManager(args.cards)
+            if not manager.load_cards(args.data):
+                return 1
+            export_cards(manager.cards, out, args.format, deck=args.anki_deck)
+        else:
+            export_words(
+                load_words(args.data), out, args.format, deck=args.anki_deck
+            )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_decks(args):
+    index = args.registry.read_index()
+    for name, due in args.registry.due_counts().items():
+        emit(
+            {
+                "deck": name,
+                "due": due,
+                "words": index.get(name, {}).get("words"),
+                "path": args.registry.directory(name),
+            }
+        )
+    return 0
+
+
+def cmd_backups(args):
+    from src.backup import CARDS, WORDS, SnapshotStore, backup_dir, format_time
+
+    backups = SnapshotStore(backup_dir(args.data))
+    paths = {WORDS: args.data}
+    if args.cards is not None:
+        paths[CARDS] = args.cards
+    if args.only:
+        if args.only not in paths:
+            args.parser.error(f"no {args.only} file for this deck")
+        paths = {args.only: paths[args.only]}
+
+    if args.action == "list":
+        for entry in backups.snapshots():
+            emit({**entry, "created": format_time(entry["created"])})
+        return 0
+    if args.action == "snapshot":
+        entry = backups.snapshot_files(paths)
+        emit({"snapshot": entry and entry["id"], "changed": entry is not None})
+        return 0
+    if args.action == "diff":
+        if len(args.ids) != 2:
+            args.parser.error("diff takes two snapshot ids")
+        try:
+            for label in paths:
+                added, changed, removed = backups.diff(*args.ids, label)
+                for status, words in (
+                    ("added", added),
+                    ("changed", changed),
+                    ("removed", removed),
+                ):
+                    for word in words:
+                        emit({"file": label, "word": word, "status": status})
+        except OSError as e:
+            emit({"error": str(e)})
+            return 1
+        return 0
+
+    if args.at is not None:
+        snapshot_id = backups.at(datetime.datetime.fromisoformat(args.at))
+        if snapshot_id is None:
+            emit({"error": f"no snapshot at or before {args.at}"})
+            return 1
+    elif len(args.ids) == 1:
+        snapshot_id = args.ids[0]
+    else:
+        args.parser.error("restore takes one snapshot id or --at")
+    try:
+        if not args.only:
+            # Restore whichever of the files the snapshot holds.
+            files = backups.manifest(snapshot_id)["files"]
+            paths = {label: path for label, path in paths.items() if label in files}
+        backups.restore(snapshot_id, paths)
+    except (KeyError, OSError) as e:
+        emit({"snapshot": snapshot_id, "error": str(e)})
+        return 1
+    emit({"snapshot": snapshot_id, "status": "restored", "files": list(paths)})
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli", description="Headless dictionary tools"
+    )
+    parser.add_argument(
+        "--deck", help=f"deck to work on (default: {DEFAULT_DECK})"
+    )
+    parser.add_argument(
+        "--data", help="words file, overriding the deck's (e.g. for scratch files)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def with_word_input(sub):
+        sub.add_argument("words", nargs="*", help="words (default: read stdin)")
+        sub.add_argument(
+            "--file",
+            action="append",
+            default=[],
+            help="read words from a file, one per line ('-' for stdin)",
+        )
+        return sub
+
+    lookup = with_word_input(
+        commands.add_parser("lookup", help="print packets as JSON lines")
+    )
+    lookup.add_argument(
+        "--fetch", action="store_true", help="always query the API, skip the store"
+    )
+    lookup.add_argument(
+        "--jobs", type=int, help="maximum parallel fetches (default: adaptive)"
+    )
+    lookup.add_argument(
+        "--lemmas",
+        action="store_true",
+        help="also match inflected forms to stored lemmas",
+    )
+    lookup.set_defaults(func=cmd_lookup)
+
+    add = with_word_input(commands.add_parser("add", help="fetch and store words"))
+    add.add_argument(
+        "--jobs", type=int, help="maximum parallel fetches (default: adaptive)"
+    )
+    add.add_argument(
+        "--lemmas",
+        action="store_true",
+        help="also match inflected forms to stored lemmas",
+    )
+    add.set_defaults(func=cmd_add)
+
+    remove = with_word_input(commands.add_parser("remove", help="remove words"))
+    remove.set_defaults(func=cmd_remove)
+
+    export = commands.add_parser("export", help="export words or cards")
+    export.add_argument(
+        "--format", choices=["jsonl", "csv", "anki"], default="jsonl"
+    )
+    export.add_argument(
+        "--source",
+        choices=["words", "cards"],
+        default="words",
+        help="export dictionary entries or flashcards with review state",
+    )
+    export.add_argument(
+        "--cards", help="flashcards file, overriding the deck's"
+    )
+    export.add_argument(
+        "--anki-deck", default="Dictionary", help="deck name in Anki exports"
+    )
+    export.add_argument("--output", "-o", help="write to a file instead of stdout")
+    export.set_defaults(func=cmd_export)
+
+    decks = commands.add_parser("decks", help="list decks with due counts")
+    decks.set_defaults(func=cmd_decks)
+
+    backups = commands.add_parser(
+        "backups", help="list, take, compare and restore snapshots"
+    )
+    backups.add_argument("action", choices=["list", "snapshot", "diff", "restore"])
+    backups.add_argument("ids", nargs="*", type=int, help="snapshot ids")
+    backups.add_argument(
+        "--at", help="restore the last snapshot taken at or before this time"
+    )
+    backups.add_argument(
+        "--only", choices=["words", "cards"], help="limit to one of the files"
+    )
+    backups.add_argument("--cards", help="flashcards file, overriding the deck's")
+    backups.set_defaults(func=cmd_backups, parser=backups)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.deck is not None and args.data is not None:
+        parser.error("use either --deck or --data, not both")
+    args.registry = DeckRegistry()
+    if args.data is None:
+        args.deck = args.deck or DEFAULT_DECK
+        args.data = args.registry.words_path(args.deck)
+    if args.command == "export" and args.cards is None:
+        args.cards = args.registry.cards_path(args.deck or DEFAULT_DECK)
+    if args.command == "backups" and args.cards is None and args.deck is not None:
+        args.cards = args.registry.cards_path(args.deck)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # Downstream closed the pipe (e.g. `| head`); that is not an error.
+        sys.stderr.close()
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
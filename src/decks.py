@@ -0,0 +1,116 @@
+"""
+Named decks, each with its own word and flashcard stores.
+
+The default deck lives directly in ``data/`` (so existing installs keep their
+files); other decks live in ``data/decks/<name>/``. Nothing is loaded until a
+deck is opened. A small summary index (``data/decks.json``) keeps per-deck
+word counts and a histogram of review dates, so due counts across all decks
+can be shown without loading any of them.
+"""
+
+import datetime
+import json
+import os
+import re
+
+from src.storage import resource_path
+
+DEFAULT_DECK = "default"
+INDEX_FILE = "decks.json"
+DECK_NAME = re.compile(r"^[\w][\w \-]{0,63}$")
+
+
+class DeckRegistry:
+    def __init__(self, root=None):
+        self.root = root or resource_path("data")
+
+    def directory(self, name):
+        if name == DEFAULT_DECK:
+            return self.root
+        return os.path.join(self.root, "decks", name)
+
+    def words_path(self, name):
+        return os.path.join(self.directory(name), "words.json")
+
+    def cards_path(self, name):
+        return os.path.join(self.directory(name), "flashcards.json")
+
+    def names(self):
+        """Return the default deck followed by the others, sorted."""
+        decks_dir = os.path.join(self.root, "decks")
+        others = []
+        if os.path.isdir(decks_dir):
+            others = sorted(
+                entry
+                for entry in os.listdir(decks_dir)
+                if os.path.isdir(os.path.join(decks_dir, entry))
+            )
+        return [DEFAULT_DECK] + others
+
+    def create(self, name):
+        """
+        Create an empty deck.
+
+        Raises:
+            ValueError: If the name is invalid or already taken
+        """
+        name = name.strip()
+        if not DECK_NAME.match(name) or name == DEFAULT_DECK:
+            raise ValueError(f"'{name}' is not a valid deck name")
+        if name in self.names():
+            raise ValueError(f"Deck '{name}' already exists")
+        os.makedirs(self.directory(name))
+        return name
+
+    # Summary index
+
+    def _index_path(self):
+        return os.path.join(self.root, INDEX_FILE)
+
+    def read_index(self):
+        try:
+            with open(self._index_path(), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_index(self, name, **fields):
+        index = self.read_index()
+        index.setdefault(name, {}).update(fields)
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = f"{self._index_path()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(temp_path, self._index_path())
+
+    def record_words(self, name, words_data):
+        """Store the word count of a deck in the summary index."""
+        self._update_index(name, words=len(words_data))
+
+    def record_cards(self, name, cards):
+        """Store a histogram of next review dates for a deck's cards."""
+        histogram = {}
+        for card in cards.values():
+            day = card.next_review.strftime("%Y-%m-%d")
+            histogram[day] = histogram.get(day, 0) + 1
+        self._update_index(name, cards=len(cards), due=histogram)
+
+    def due_counts(self, today=None):
+        """
+        Return cards due per deck, read from the summary index only.
+
+        Decks whose cards have never been summarised are assumed fully due
+        (every new card is due immediately).
+        """
+        today = (today or datetime.datetime.now().date()).strftime("%Y-%m-%d")
+        index = self.read_index()
+        counts = {}
+        for name in self.names():
+            summary = index.get(name, {})
+            if "due" in summary:
+                counts[name] = sum(
+                    count for day, count in summary["due"].items() if day <= today
+                )
+            else:
+                counts[name] = summary.get("words", 0)
+        return counts
@@ -0,0 +1,191 @@
+"""
+Streaming exporters for words and flashcards.
+
+Records are produced by generators over ``DictionaryApp.words_data`` or
+``FlashcardManager.cards`` and written in fixed-size chunks, so exporting a
+large deck never builds the whole output in memory.
+
+Supported formats:
+    jsonl: one JSON object per word or card
+    csv:   one row per sense (words) or per card (cards)
+    anki:  tab-separated notes with Anki's import headers; import it with
+           File > Import in Anki to get a Basic note per word
+"""
+
+import csv
+import io
+import json
+import sys
+
+from src.cards import format_definitions
+from src.packet import json_default
+
+CHUNK_SIZE = 1000  # Records buffered before each write
+
+WORD_FIELDS = ["word", "part_of_speech", "definition", "example"]
+CARD_FIELDS = [
+    "word",
+    "ease_factor",
+    "interval",
+    "repetitions",
+    "next_review",
+    "last_review",
+    "definitions",
+]
+
+
+def iter_word_records(words_data):
+    """Yield one ``{"word", "packet"}`` record per word."""
+    for word, packet in words_data.items():
+        yield {"word": word, "packet": packet}
+
+
+def iter_word_rows(words_data):
+    """Yield one flat row per sense, in ``WORD_FIELDS`` order."""
+    for word, packet in words_data.items():
+        for sense in packet:
+            yield [
+                word,
+                sense.get("part_of_speech", ""),
+                sense.get("definition", ""),
+                sense.get("example") or "",
+            ]
+
+
+def card_record(card):
+    """Return the serialisable state of a card, as stored in flashcards.json."""
+    return {"word": card.word, **card.to_record()}
+
+
+def iter_card_records(cards):
+    """Yield one record per card of a ``FlashcardManager.cards`` mapping."""
+    for card in cards.values():
+        yield card_record(card)
+
+
+def iter_card_rows(cards):
+    """Yield one flat row per card, definitions encoded as JSON."""
+    for record in iter_card_records(cards):
+        record["definitions"] = json.dumps(
+            record["definitions"], ensure_ascii=False, default=json_default
+        )
+        yield [record[field] for field in CARD_FIELDS]
+
+
+def card_state(card):
+    """Return the review state tag used by the stats display."""
+    if card.repetitions == 0:
+        return "new"
+    if card.interval >= 21:
+        return "learned"
+    return "reviewing"
+
+
+def iter_anki_notes(words_data=None, cards=None):
+    """Yield ``[front, back, tags]`` notes from words or cards."""
+    if cards is not None:
+        for card in cards.values():
+            # Not get_formatted_definitions: its cache would keep the HTML
+            # of every exported card alive.
+            yield [
+                card.word,
+                format_definitions(card.definitions),
+                f"dictionary-app {card_state(card)}",
+            ]
+    else:
+        for word, packet in words_data.items():
+            yield [word, format_definitions(packet), "dictionary-app"]
+
+
+def write_chunks(out, lines, chunk_size=CHUNK_SIZE):
+    """Write an iterable of strings to ``out`` in chunks; return the count."""
+    count = 0
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            out.write("".join(chunk))
+            count += len(chunk)
+            chunk.clear()
+    if chunk:
+        out.write("".join(chunk))
+        count += len(chunk)
+    return count
+
+
+def iter_jsonl(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False, default=json_default) + "\n"
+
+
+def iter_delimited(rows, header=None, delimiter=","):
+    """Yield rows formatted as CSV lines, reusing a single small buffer."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+    if header:
+        writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Without any rows the header is still pending in the buffer.
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def anki_lines(notes, deck="Dictionary"):
+    headers = [
+        "#separator:tab\n",
+        "#html:true\n",
+        "#notetype:Basic\n",
+        f"#deck:{deck}\n",
+        "#tags column:3\n",
+    ]
+    yield from headers
+    yield from iter_delimited(notes, delimiter="\t")
+
+
+def export_words(words_data, out, fmt="jsonl", chunk_size=CHUNK_SIZE, deck="Dictionary"):
+    """
+    Stream a words mapping to a text stream.
+
+    Args:
+        words_data (dict): Mapping of words to packets
+        out: Writable text stream
+        fmt (str): One of 'jsonl', 'csv' or 'anki'
+        chunk_size (int): Number of lines buffered per write
+        deck (str): Target deck name for Anki exports
+
+    Returns:
+        int: Number of lines written, headers included
+    """
+    if fmt == "jsonl":
+        lines = iter_jsonl(iter_word_records(words_data))
+    elif fmt == "csv":
+        lines = iter_delimited(iter_word_rows(words_data), header=WORD_FIELDS)
+    elif fmt == "anki":
+        lines = anki_lines(iter_anki_notes(words_data=words_data), deck)
+    else:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    return write_chunks(out, lines, chunk_size)
+
+
+def export_cards(cards, out, fmt="jsonl", chunk_size=CHUNK_SIZE, deck="Dictionary"):
+    """Stream a ``FlashcardManager.cards`` mapping; see ``export_words``."""
+    if fmt == "jsonl":
+        lines = iter_jsonl(iter_card_records(cards))
+    elif fmt == "csv":
+        lines = iter_delimited(iter_card_rows(cards), header=CARD_FIELDS)
+    elif fmt == "anki":
+        lines = anki_lines(iter_anki_notes(cards=cards), deck)
+    else:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    return write_chunks(out, lines, chunk_size)
+
+
+def open_output(path):
+    """Open ``path`` for writing, '-' or None meaning stdout."""
+    if not path or path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8", newline="")
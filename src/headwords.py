@@ -0,0 +1,234 @@
+"""
+Canonical headwords for user input.
+
+Words are typed with stray capitals, trailing spaces, full-width letters or
+curly apostrophes, and often in an inflected form. ``headword`` turns input
+into the spelling that is stored and sent to the API; ``HeadwordIndex``
+finds the stored word that input refers to, so "Run ", "running" and "runs"
+all resolve to a stored "run" instead of being fetched and stored again.
+
+Index keys are case-folded and NFKC-normalized. Inflected forms are mapped to
+their lemma by a small English lemmatizer: an exception table for irregular
+forms, then suffix rules. The rules over-generate candidates ("running" gives
+"runn", "run" and "runne"), which is harmless because a candidate only counts
+when it is a stored word. Resolving tries a fixed number of candidates, each
+a dict lookup, so it costs the same however large the deck is.
+"""
+
+import re
+import unicodedata
+
+MIN_STEM = 3  # Shortest lemma suffix rules may produce
+
+_WHITESPACE = re.compile(r"\s+")
+_APOSTROPHES = str.maketrans({"‘": "'", "’": "'", "ʼ": "'", "`": "'"})
+
+# Irregular inflections that suffix rules cannot undo, by lemma. Forms that
+# are words of their own ("left", "found", "better") are left out.
+_IRREGULAR = {
+    "be": "am are is was were been being",
+    "have": "has had having",
+    "do": "does did done doing",
+    "go": "goes went gone",
+    "say": "says said",
+    "make": "made",
+    "take": "took taken",
+    "come": "came",
+    "see": "seen",
+    "know": "knew known",
+    "get": "got gotten",
+    "give": "gave given",
+    "think": "thought",
+    "tell": "told",
+    "become": "became",
+    "bring": "brought",
+    "begin": "began begun",
+    "keep": "kept",
+    "hold": "held",
+    "write": "wrote written",
+    "stand": "stood",
+    "hear": "heard",
+    "mean": "meant",
+    "meet": "met",
+    "run": "ran",
+    "pay": "paid",
+    "sit": "sat",
+    "speak": "spoke spoken",
+    "lie": "lain lying",
+    "die": "dying",
+    "tie": "tying",
+    "lead": "led",
+    "grow": "grew grown",
+    "lose": "lost",
+    "fall": "fell fallen",
+    "send": "sent",
+    "build": "built",
+    "understand": "understood",
+    "draw": "drew drawn",
+    "break": "broke broken",
+    "spend": "spent",
+    "rise": "rose risen",
+    "drive": "drove driven",
+    "buy": "bought",
+    "wear": "wore worn",
+    "choose": "chose chosen",
+    "seek": "sought",
+    "throw": "threw thrown",
+    "catch": "caught",
+    "teach": "taught",
+    "fight": "fought",
+    "eat": "ate eaten",
+    "forget": "forgot forgotten",
+    "sell": "sold",
+    "fly": "flew flown",
+    "swim": "swam swum",
+    "sing": "sang sung",
+    "drink": "drank",
+    "ride": "rode ridden",
+    "steal": "stole stolen",
+    "hide": "hid hidden",
+    "shake": "shook shaken",
+    "wake": "woke woken",
+    "freeze": "froze frozen",
+    "man": "men",
+    "woman": "women",
+    "child": "children",
+    "mouse": "mice",
+    "goose": "geese",
+    "foot": "feet",
+    "tooth": "teeth",
+    "ox": "oxen",
+}
+EXCEPTIONS = {
+    form: lemma for lemma, forms in _IRREGULAR.items() for form in forms.split()
+}
+
+# (suffix, replacements) tried in order; every match adds candidates.
+_SUFFIX_RULES = (
+    ("'s", ("",)),
+    ("s'", ("s",)),
+    ("ies", ("y", "ie")),
+    ("ves", ("f", "fe")),
+    ("sses", ("ss",)),
+    ("ses", ("s", "se")),
+    ("xes", ("x",)),
+    ("zes", ("z",)),
+    ("ches", ("ch",)),
+    ("shes", ("sh",)),
+    ("oes", ("o",)),
+    ("es", ("e",)),
+    ("s", ("",)),
+    ("ied", ("y",)),
+    ("ed", ("", "e")),
+    ("ing", ("", "e")),
+)
+_NOT_PLURAL = ("ss", "us", "is")  # Words that only look like plurals
+
+
+def headword(text):
+    """
+    The spelling of ``text`` to store and look up.
+
+    NFKC-normalized, lower case, with curly apostrophes straightened and
+    whitespace collapsed. Empty for blank input.
+    """
+    text = unicodedata.normalize("NFKC", text).translate(_APOSTROPHES)
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def index_key(text):
+    """The case-folded key under which a word is indexed."""
+    return headword(text).casefold()
+
+
+def lemma_candidates(key):
+    """
+    Possible lemmas of an indexed key, most likely first.
+
+    Args:
+        key (str): A key from ``index_key``
+
+    Returns:
+        list: Candidates, not including ``key`` itself
+    """
+    candidates = []
+    if key in EXCEPTIONS:
+        candidates.append(EXCEPTIONS[key])
+    if " " in key:
+        return candidates
+    for suffix, replacements in _SUFFIX_RULES:
+        if not key.endswith(suffix):
+            continue
+        if suffix == "s" and key.endswith(_NOT_PLURAL + ("'s",)):
+            continue
+        stem = key[: -len(suffix)]
+        if suffix in ("'s", "s'"):
+            # Possessives: any stem, and nothing else applies.
+            candidates.extend(stem + replacement for replacement in replacements)
+            break
+        candidates.extend(
+            stem + replacement
+            for replacement in replacements
+            if len(stem + replacement) >= MIN_STEM
+        )
+        if suffix in ("ed", "ing") and _doubled(stem):
+            candidates.append(stem[:-1])  # running -> run, stopped -> stop
+    return [c for i, c in enumerate(candidates) if c and c not in candidates[:i]]
+
+
+def _doubled(stem):
+    return len(stem) > MIN_STEM and stem[-1] == stem[-2] and stem[-1] not in "aeiouls"
+
+
+class HeadwordIndex:
+    """
+    Maps input to stored headwords in constant time.
+
+    Keeps one index key per stored word; the first word stored under a key
+    wins. Call ``add`` and ``discard`` as words are stored and removed.
+
+    Args:
+        words (iterable): Stored words to index
+    """
+
+    def __init__(self, words=()):
+        self.keys = {}  # Index key -> stored word
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        self.keys.setdefault(index_key(word), word)
+
+    def discard(self, word):
+        key = index_key(word)
+        if self.keys.get(key) == word:
+            del self.keys[key]
+
+    def clear(self):
+        self.keys.clear()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, text):
+        return self.resolve(text) is not None
+
+    def resolve(self, text, lemmas=True):
+        """
+        The stored word that ``text`` refers to.
+
+        Args:
+            text (str): User input
+            lemmas (bool): Also match stored lemmas of an inflected form
+
+        Returns:
+            str: The stored word, or None if there is none
+        """
+        key = index_key(text)
+        if key in self.keys:
+            return self.keys[key]
+        if lemmas:
+            for candidate in lemma_candidates(key):
+                if candidate in self.keys:
+                    return self.keys[candidate]
+        return None
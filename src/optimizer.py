@@ -0,0 +1,200 @@
+"""
+Fit per-deck scheduler parameters from the review log.
+
+Every review recorded by ``FlashcardManager`` is replayed under candidate SM-2
+parameters. The interval a candidate would have scheduled is read as the
+time at which recall drops to the target retention, so a review after
+``elapsed`` days is predicted to succeed with probability
+``retention ** (elapsed / interval)``. The candidate whose predictions best
+explain the recorded outcomes (maximum log-likelihood) is the one whose
+intervals actually hit the target retention for this learner; if memory is
+better than the defaults assume, its intervals are longer and fewer reviews
+are needed. The fit is only saved when it does need fewer simulated reviews
+per year than the defaults; otherwise the result is just reported.
+
+Candidates are evaluated in parallel across a process pool.
+
+Usage (from the repository root):
+    python -m src.optimizer                      # data/reviews.log
+    python -m src.optimizer --log path/to/reviews.log --workers 8
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from src.cards import (
+    DEFAULT_PARAMETERS,
+    PARAMETERS_FILE,
+    read_reviews,
+    schedule,
+)
+from src.storage import resource_path
+
+MIN_REVIEWS = 50  # Scored reviews needed before fitting is meaningful
+
+GRID = {
+    "initial_ease": [1.7, 1.9, 2.1, 2.3, 2.5, 2.7, 2.9, 3.1],
+    "first_interval": [1, 2, 3],
+    "second_interval": [2, 3, 4, 6, 8],
+    "min_ease": [1.1, 1.3, 1.5],
+    "interval_modifier": [0.7, 0.85, 1.0, 1.15, 1.3, 1.5],
+}
+
+_histories = None  # Set in each worker process by _init_worker
+
+
+def load_histories(path):
+    """
+    Group a review log into per-word histories.
+
+    Returns:
+        list: ``(state, [(quality, elapsed), ...])`` pairs, where ``state``
+        is the card's ``(repetitions, interval, ease_factor)`` before its
+        first logged review, or None for a card that was new then. Cards
+        already scheduled before logging started whose state was not logged
+        are left out: replaying them from scratch would score their later
+        reviews against the wrong intervals.
+    """
+    histories = {}
+    for _, word, quality, elapsed, state in read_reviews(path):
+        if word not in histories:
+            if elapsed >= 0 and state is None:
+                histories[word] = None
+                continue
+            histories[word] = (state if elapsed >= 0 else None, [])
+        if histories[word] is not None:
+            histories[word][1].append((quality, elapsed))
+    return [history for history in histories.values() if history is not None]
+
+
+def log_likelihood(histories, parameters, retention):
+    """Return the log-likelihood of all scored reviews and their count."""
+    total = 0.0
+    scored = 0
+    for state, history in histories:
+        if state is None:
+            repetitions, interval = 0, 0
+            ease_factor = parameters["initial_ease"]
+        else:
+            # Already scheduled by earlier reviews; only later ones replay.
+            repetitions, interval, ease_factor = state
+            ease_factor = max(ease_factor, parameters["min_ease"])
+        for index, (quality, elapsed) in enumerate(history):
+            if index and elapsed >= 0:
+                p = retention ** (elapsed / max(interval, 1))
+                p = min(max(p, 0.001), 0.999)
+                total += math.log(p if quality >= 3 else 1 - p)
+                scored += 1
+            repetitions, interval, ease_factor = schedule(
+                quality, repetitions, interval, ease_factor, parameters
+            )
+    return total, scored
+
+
+def reviews_per_year(parameters, quality=4, horizon=365):
+    """Reviews one card needs in ``horizon`` days if always answered ``quality``."""
+    repetitions, interval, ease_factor = 0, 0, parameters["initial_ease"]
+    day = reviews = 0
+    while day <= horizon:
+        reviews += 1
+        repetitions, interval, ease_factor = schedule(
+            quality, repetitions, interval, ease_factor, parameters
+        )
+        day += max(interval, 1)
+    return reviews
+
+
+def candidates():
+    keys = list(GRID)
+    for values in itertools.product(*(GRID[key] for key in keys)):
+        yield dict(zip(keys, values))
+
+
+def _init_worker(histories):
+    global _histories
+    _histories = histories
+
+
+def _evaluate(batch, retention):
+    """Return ``(log_likelihood, parameters)`` of the best candidate in batch."""
+    best = (-math.inf, None)
+    for parameters in batch:
+        score, _ = log_likelihood(_histories, parameters, retention)
+        if score > best[0]:
+            best = (score, parameters)
+    return best
+
+
+def fit(histories, retention=0.9, workers=None):
+    """
+    Search the parameter grid for the best fit to ``histories``.
+
+    Returns:
+        dict: Fitted parameters with their log-likelihood and the default's
+    """
+    _, scored = log_likelihood(histories, DEFAULT_PARAMETERS, retention)
+    if scored < MIN_REVIEWS:
+        raise ValueError(
+            f"Only {scored} scored reviews; at least {MIN_REVIEWS} are needed"
+        )
+
+    grid = list(candidates())
+    workers = workers or os.cpu_count() or 1
+    size = max(1, math.ceil(len(grid) / (workers * 4)))
+    batches = [grid[i : i + size] for i in range(0, len(grid), size)]
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(histories,)
+    ) as pool:
+        results = list(pool.map(_evaluate, batches, itertools.repeat(retention)))
+    score, parameters = max(results, key=lambda result: result[0])
+
+    baseline, _ = log_likelihood(histories, DEFAULT_PARAMETERS, retention)
+    return {
+        "parameters": parameters,
+        "retention": retention,
+        "reviews": scored,
+        "log_likelihood": round(score, 3),
+        "default_log_likelihood": round(baseline, 3),
+        "reviews_per_year": reviews_per_year(parameters),
+        "default_reviews_per_year": reviews_per_year(DEFAULT_PARAMETERS),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit scheduler parameters")
+    parser.add_argument("--log", default=resource_path("data/reviews.log"))
+    parser.add_argument(
+        "--output", help=f"default: {PARAMETERS_FILE} next to the log"
+    )
+    parser.add_argument("--retention", type=float, default=0.9)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.log):
+        print(f"No review log at {args.log}")
+        return 1
+    try:
+        result = fit(load_histories(args.log), args.retention, args.workers)
+    except ValueError as e:
+        print(e)
+        return 1
+
+    print(json.dumps(result, indent=2))
+    if result["reviews_per_year"] >= result["default_reviews_per_year"]:
+        # A better fit that costs more reviews is not worth switching to.
+        print("The fitted parameters need no fewer reviews; nothing written")
+        return 0
+    output = args.output or os.path.join(os.path.dirname(args.log), PARAMETERS_FILE)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Parameters written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
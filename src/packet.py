@@ -0,0 +1,236 @@
+"""
+Compact in-memory representation of word packets.
+
+A packet is a list of senses. Loaded from JSON, every sense would be a dict
+with three keys and its own copy of the part of speech. Senses are kept as
+slotted records instead: parts of speech are interned, and the example slot
+only exists on senses that have one. Records behave like read-only mappings,
+so ``sense["definition"]`` and ``sense.get("example")`` keep working, and
+compare equal to the equivalent dicts. Synonyms and antonyms only take
+space on the senses that have some.
+
+Pronunciations from the API are kept alongside the senses in a ``Packet``,
+a read-only sequence of senses with a ``phonetics`` list. Packets without
+phonetics stay plain lists, in memory and on disk.
+"""
+
+import sys
+from collections.abc import Mapping, Sequence
+
+SENSE_KEYS = ("part_of_speech", "definition", "example")
+RELATED_KEYS = ("synonyms", "antonyms")
+_SENSE_KEY_SET = frozenset(SENSE_KEYS + RELATED_KEYS)
+_PACKET_KEY_SET = frozenset(("senses", "phonetics"))
+
+
+def _same_related(a, b):
+    # Plain senses have () where related ones have a list.
+    return a == b or not (a or b)
+
+
+class Sense(Mapping):
+    """A sense without an example."""
+
+    __slots__ = ("part_of_speech", "definition")
+
+    example = None
+    synonyms = antonyms = ()
+    _fields = SENSE_KEYS
+
+    def __init__(self, part_of_speech, definition):
+        self.part_of_speech = part_of_speech
+        self.definition = definition
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __eq__(self, other):
+        if isinstance(other, Sense):
+            return (
+                self.definition == other.definition
+                and self.part_of_speech == other.part_of_speech
+                and self.example == other.example
+                and _same_related(self.synonyms, other.synonyms)
+                and _same_related(self.antonyms, other.antonyms)
+            )
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def __reduce__(self):
+        return make_sense, (
+            self.part_of_speech,
+            self.definition,
+            self.example,
+            self.synonyms,
+            self.antonyms,
+        )
+
+
+class ExampleSense(Sense):
+    """A sense with a usage example."""
+
+    __slots__ = ("example",)
+
+    def __init__(self, part_of_speech, definition, example):
+        super().__init__(part_of_speech, definition)
+        self.example = example
+
+
+class RelatedSense(ExampleSense):
+    """A sense with synonyms or antonyms, and possibly an example."""
+
+    __slots__ = ("synonyms", "antonyms")
+
+    _fields = SENSE_KEYS + RELATED_KEYS
+
+    def __init__(self, part_of_speech, definition, example, synonyms, antonyms):
+        super().__init__(part_of_speech, definition, example)
+        self.synonyms = list(synonyms or ())
+        self.antonyms = list(antonyms or ())
+
+
+def make_sense(part_of_speech, definition, example=None, synonyms=(), antonyms=()):
+    """Build the smallest record for a sense, interning its part of speech."""
+    part_of_speech = sys.intern(part_of_speech or "")
+    if synonyms or antonyms:
+        return RelatedSense(
+            part_of_speech, definition, example or None, synonyms, antonyms
+        )
+    if example:
+        return ExampleSense(part_of_speech, definition, example)
+    return Sense(part_of_speech, definition)
+
+
+class Packet(Sequence):
+    """
+    The senses of a word together with its phonetics.
+
+    Args:
+        senses (list): Sense records
+        phonetics (list): ``{"text", "audio"}`` dicts, audio URLs may be empty
+    """
+
+    __slots__ = ("senses", "phonetics")
+
+    def __init__(self, senses, phonetics):
+        self.senses = senses
+        self.phonetics = phonetics
+
+    def __getitem__(self, index):
+        return self.senses[index]
+
+    def __len__(self):
+        return len(self.senses)
+
+    def __eq__(self, other):
+        if isinstance(other, Packet):
+            return self.senses == other.senses and self.phonetics == other.phonetics
+        if isinstance(other, list):
+            return not self.phonetics and self.senses == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Packet({self.senses!r}, phonetics={self.phonetics!r})"
+
+    def __reduce__(self):
+        return make_packet, (self.senses, self.phonetics)
+
+
+def make_packet(senses, phonetics=None):
+    """Return a ``Packet``, or just the list of senses without phonetics."""
+    if phonetics:
+        return Packet(senses, phonetics)
+    return senses
+
+
+def packet_phonetics(packet):
+    """The phonetics stored with a packet, empty for plain lists."""
+    return getattr(packet, "phonetics", [])
+
+
+def compact_packet(packet):
+    """
+    Convert a packet of sense mappings into compact records.
+
+    Args:
+        packet (list): Senses with ``part_of_speech``, ``definition`` and
+            optional ``example`` keys
+
+    Returns:
+        list: The same senses as ``Sense`` records
+    """
+    return [
+        sense
+        if isinstance(sense, Sense)
+        else make_sense(
+            sense.get("part_of_speech"),
+            sense.get("definition"),
+            sense.get("example"),
+            sense.get("synonyms"),
+            sense.get("antonyms"),
+        )
+        for sense in packet
+    ]
+
+
+def sense_hook(obj):
+    """
+    ``json`` object hook that decodes sense objects as compact records and
+    packet objects as ``Packet``.
+
+    Only for values: a words file whose only key is "senses" would look like
+    a packet, so the serializers never pass the root mapping through it.
+    """
+    # Called for every object in the file, so make_sense is inlined.
+    if len(obj) <= 5 and "definition" in obj and obj.keys() <= _SENSE_KEY_SET:
+        part_of_speech = sys.intern(obj.get("part_of_speech") or "")
+        example = obj.get("example")
+        if len(obj) > 3 and (obj.get("synonyms") or obj.get("antonyms")):
+            return RelatedSense(
+                part_of_speech,
+                obj["definition"],
+                example or None,
+                obj.get("synonyms"),
+                obj.get("antonyms"),
+            )
+        if example:
+            return ExampleSense(part_of_speech, obj["definition"], example)
+        return Sense(part_of_speech, obj["definition"])
+    if "senses" in obj and obj.keys() <= _PACKET_KEY_SET:
+        return make_packet(obj["senses"], obj.get("phonetics"))
+    return obj
+
+
+def json_default(obj):
+    """``json`` default hook that encodes compact records as plain objects."""
+    if isinstance(obj, Sense):
+        encoded = {
+            "part_of_speech": obj.part_of_speech,
+            "definition": obj.definition,
+            "example": obj.example,
+        }
+        if obj.synonyms or obj.antonyms:
+            encoded["synonyms"] = obj.synonyms
+            encoded["antonyms"] = obj.antonyms
+        return encoded
+    if isinstance(obj, Packet):
+        if not obj.phonetics:
+            return obj.senses
+        return {"senses": obj.senses, "phonetics": obj.phonetics}
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,101 @@
+"""
+Predictive prefetching of audio, Oxford links and card renders.
+
+The prefetcher runs low priority tasks on the shared ``TaskScheduler`` so that
+the next likely action (playing a neighbouring word, opening its Oxford page,
+flipping to the next card) finds its result already cached. Each call to
+``warm`` replaces the previous batch and never keeps more than ``budget``
+tasks in flight.
+
+Windows sharing a scheduler each have their own prefetcher and task group,
+so one window's batch never cancels another's. Keys are shared with the
+interactive paths (``("audio", word)`` for pronunciations), so a click on
+a word being prefetched joins that task instead of repeating the work.
+"""
+
+from src.backend import (
+    audio_urls,
+    cached_oxford_link,
+    is_audio_cached,
+    pronunciation,
+    search_oxford_dictionary,
+)
+from src.tasks import DISK, NETWORK, PRIORITY_PREFETCH
+
+
+def audio_key(word):
+    """Task key under which the pronunciation of ``word`` is fetched."""
+    return ("audio", word)
+
+
+class Prefetcher:
+    def __init__(self, scheduler, budget=6):
+        self.scheduler = scheduler
+        self.budget = budget
+        self.group = ("prefetch", id(self))
+
+    def cancel(self):
+        self.scheduler.cancel_group(self.group)
+
+    def warm(self, jobs):
+        """
+        Replace outstanding prefetch work with ``jobs``.
+
+        Args:
+            jobs (list): ``(lane, key, func, args, on_finished)`` tuples in
+                order of likelihood; anything beyond the budget is dropped
+        """
+        self.cancel()
+        for lane, key, func, args, on_finished in jobs[: self.budget]:
+            self.scheduler.submit(
+                lane,
+                key,
+                func,
+                *args,
+                priority=PRIORITY_PREFETCH,
+                group=self.group,
+                on_finished=on_finished,
+            )
+
+    def word_jobs(self, words, words_data=None):
+        """
+        Jobs warming the audio and Oxford link caches for ``words``.
+
+        Recordings listed in the packets of ``words_data`` are downloaded in
+        preference to synthesizing speech.
+        """
+        jobs = []
+        for word in words:
+            urls = audio_urls((words_data or {}).get(word, []))
+            if not is_audio_cached(word, urls):
+                jobs.append(
+                    (NETWORK, audio_key(word), pronunciation, (word, urls), None)
+                )
+            if not cached_oxford_link(word)[0]:
+                jobs.append(
+                    (NETWORK, ("oxford", word), search_oxford_dictionary, (word,), None)
+                )
+        return jobs
+
+    def warm_words(self, words, words_data=None):
+        self.warm(self.word_jobs(words, words_data))
+
+    def warm_cards(self, cards):
+        """
+        Render upcoming cards and warm their audio.
+
+        Renders are queued first since they are needed on the very next
+        flip; audio follows for as long as the budget lasts.
+        """
+        jobs = []
+        for card in cards:
+            jobs.append(
+                (DISK, ("render", card.word), card.get_formatted_definitions, (), None)
+            )
+        for card in cards:
+            word, urls = card.word, audio_urls(card.definitions)
+            if not is_audio_cached(word, urls):
+                jobs.append(
+                    (NETWORK, audio_key(word), pronunciation, (word, urls), None)
+                )
+        self.warm(jobs)
@@ -0,0 +1,105 @@
+"""
+Adaptive concurrency and rate control for upstream API traffic.
+
+``AdaptiveLimiter`` combines an AIMD concurrency window with a token bucket
+whose refill rate adapts the same way: every successful request grows both a
+little, every sign of overload (HTTP 429/503, timeouts) halves them. A
+Retry-After from the server pauses all callers until it has passed. Under
+sustained load, throughput converges on what the server tolerates.
+"""
+
+import threading
+import time
+
+SUCCESS = "success"
+FAILURE = "failure"  # Failed, but not a sign of overload; nothing adapts
+OVERLOADED = "overloaded"
+
+
+class AdaptiveLimiter:
+    """
+    Thread-safe limiter gating calls to a remote service.
+
+    Args:
+        rate (float): Initial requests per second
+        min_rate (float): Lower bound for the rate
+        max_rate (float): Upper bound for the rate
+        window (float): Initial number of concurrent requests
+        min_window (float): Lower bound for the window
+        max_window (int): Upper bound for the window
+        decrease (float): Multiplicative decrease applied on overload
+    """
+
+    def __init__(
+        self,
+        rate=5.0,
+        min_rate=0.5,
+        max_rate=50.0,
+        window=4.0,
+        min_window=1.0,
+        max_window=16,
+        decrease=0.5,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.window = window
+        self.min_window = min_window
+        self.max_window = max_window
+        self.decrease = decrease
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.active = 0
+        self.condition = threading.Condition()
+
+    def _refill(self, now):
+        burst = max(1.0, self.window)
+        self.tokens = min(burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a request may be sent; pair with ``release``."""
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    self.condition.wait(self.paused_until - now)
+                    continue
+                if self.active >= int(self.window):
+                    self.condition.wait()
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.active += 1
+                    return
+                self.condition.wait((1 - self.tokens) / self.rate)
+
+    def release(self, outcome=SUCCESS):
+        """Return a slot and adapt the window and rate to ``outcome``."""
+        with self.condition:
+            self.active -= 1
+            if outcome == SUCCESS:
+                # Additive increase: about +1 per window (or second) of successes.
+                self.window = min(self.max_window, self.window + 1 / self.window)
+                self.rate = min(self.max_rate, self.rate + 1 / self.rate)
+            elif outcome == OVERLOADED:
+                self.window = max(self.min_window, self.window * self.decrease)
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self.tokens = min(self.tokens, 0.0)
+            self.condition.notify_all()
+
+    def pause(self, seconds):
+        """Hold back every caller for ``seconds`` (e.g. from Retry-After)."""
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.condition.notify_all()
+
+    def snapshot(self):
+        with self.condition:
+            return {
+                "window": round(self.window, 2),
+                "rate": round(self.rate, 2),
+                "active": self.active,
+            }
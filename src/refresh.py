@@ -0,0 +1,129 @@
+"""
+Incremental re-validation of stored word packets.
+
+Packets are checked oldest first, a limited number per run. Each check sends
+the ETag/Last-Modified validators remembered from the previous fetch, so an
+unchanged entry costs a bodyless 304 response. When the server provides no
+validators the packet is re-parsed and compared by content hash instead.
+Only packets that actually changed are reported back.
+
+Validation metadata lives next to the words file in ``refresh.json``.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import requests
+
+from src.backend import RateLimitedError, get_response_conditional, parse_word_packet
+from src.packet import json_default
+
+REFRESH_BUDGET = 25  # Words re-validated per run
+
+
+def packet_hash(packet):
+    """Return a stable content hash of a packet."""
+    encoded = json.dumps(
+        packet, sort_keys=True, separators=(",", ":"), default=json_default
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def metadata_path(words_path):
+    return os.path.join(os.path.dirname(words_path), "refresh.json")
+
+
+class PacketRefresher:
+    """
+    Re-validates stored packets against the dictionary API.
+
+    Args:
+        path (str): Metadata file holding validators and check times
+        budget (int): Maximum number of words checked per run
+    """
+
+    def __init__(self, path, budget=REFRESH_BUDGET):
+        self.path = path
+        self.budget = budget
+        self.metadata = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                self.metadata = json.load(f)
+        except (OSError, ValueError):
+            self.metadata = {}
+
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.metadata, f, separators=(",", ":"))
+        os.replace(temp_path, self.path)
+
+    def due_words(self, words):
+        """Return up to ``budget`` of ``words``, least recently checked first."""
+        never = {"checked": 0}
+        ordered = sorted(
+            words, key=lambda word: self.metadata.get(word, never)["checked"]
+        )
+        return ordered[: self.budget]
+
+    def check(self, word, packet):
+        """
+        Re-validate one packet.
+
+        Returns:
+            list: The new packet if it changed, otherwise None
+        """
+        meta = self.metadata.get(word, {})
+        stored_hash = meta.get("hash") or packet_hash(packet)
+        try:
+            result, validators = get_response_conditional(
+                word, meta.get("etag"), meta.get("last_modified")
+            )
+        except ValueError:
+            # No longer known upstream; keep what we have.
+            result, validators = None, {}
+
+        changed = None
+        if result is not None:
+            fresh = parse_word_packet(result)
+            fresh_hash = packet_hash(fresh)
+            if fresh and fresh_hash != stored_hash:
+                changed, stored_hash = fresh, fresh_hash
+
+        meta = {"checked": time.time(), "hash": stored_hash}
+        meta.update({k: v for k, v in validators.items() if v})
+        self.metadata[word] = meta
+        return changed
+
+    def run(self, words_data):
+        """
+        Re-validate the least recently checked packets of ``words_data``.
+
+        Args:
+            words_data (dict): Snapshot of the words mapping; not modified
+
+        Returns:
+            dict: Changed packets by word
+        """
+        for word in set(self.metadata) - set(words_data):
+            del self.metadata[word]
+
+        changed = {}
+        for word in self.due_words(words_data):
+            try:
+                packet = self.check(word, words_data[word])
+            except RateLimitedError:
+                # The limiter is paused; leave the rest for the next run.
+                break
+            except requests.exceptions.RequestException as e:
+                print(f"Error refreshing '{word}': {e}")
+                continue
+            if packet is not None:
+                changed[word] = packet
+        self.save()
+        return changed
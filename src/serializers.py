@@ -0,0 +1,360 @@
+"""
+File formats for the words and flashcard files.
+
+A format is a serializer (JSON or MessagePack) optionally wrapped in a
+compression (gzip or zstd), named like ``json``, ``json+gzip`` or
+``msgpack+zstd``. Files are recognised by their content on load, so a deck
+can switch formats at any time: it is read in whatever format it was
+written in and saved in the configured one.
+
+orjson, msgpack and zstandard are optional. When orjson is installed it
+replaces the standard library for JSON; the MessagePack and zstd formats
+are only available when their package is. The format used for writing is
+taken from the ``DICTIONARY_FILE_FORMAT`` environment variable and
+defaults to compact JSON.
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+
+from src.packet import json_default, sense_hook
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT_ENV = "DICTIONARY_FILE_FORMAT"
+DEFAULT_FORMAT = "json"
+
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+
+_JSON_START = frozenset(b"{ \t\r\n")
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+STREAM_CHUNK_SIZE = 64 * 1024  # Characters read from the file at a time
+
+
+def iter_json_items(file, object_hook=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Incrementally parse a JSON object, yielding its members as they are read.
+
+    Only the top-level object is parsed piecewise; each value is decoded with
+    the standard decoder once it is complete in the buffer. Memory use is
+    bounded by the largest single value rather than by the file size.
+
+    Args:
+        file: Text file object positioned at the start of the document
+        object_hook (callable): Passed on to the JSON decoder
+        chunk_size (int): Characters read per refill
+
+    Yields:
+        tuple: ``(key, value)`` for each member, in file order
+
+    Raises:
+        ValueError: If the document is not a JSON object
+    """
+    decode = json.JSONDecoder(object_hook=object_hook).raw_decode
+    buffer = ""
+    pos = 0
+    eof = False
+    expect = "{"
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                if expect == "end":
+                    return
+                raise ValueError("Unexpected end of JSON object")
+            more = file.read(chunk_size)
+            buffer, pos, eof = more, 0, not more
+            continue
+
+        char = buffer[pos]
+        if expect == "{":
+            if char != "{":
+                raise ValueError("Expected a JSON object")
+            pos += 1
+            expect = "first"
+        elif expect in ("first", ","):
+            if char == "}":
+                pos += 1
+                expect = "end"
+            elif expect == ",":
+                if char != ",":
+                    raise ValueError(f"Expected ',' or '}}' at {char!r}")
+                pos += 1
+                expect = "key"
+            else:
+                expect = "key"
+        elif expect == ":":
+            if char != ":":
+                raise ValueError(f"Expected ':' at {char!r}")
+            pos += 1
+            expect = "value"
+        elif expect == "end":
+            raise ValueError("Extra data after JSON object")
+        else:
+            if expect == "key" and char != '"':
+                raise ValueError(f"Expected a key at {char!r}")
+            try:
+                value, end = decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = len(buffer)
+            if not eof and (
+                end == len(buffer)
+                or isinstance(value, (int, float))
+                and buffer[_WHITESPACE.match(buffer, end).end() :][:1] not in (",", "}")
+            ):
+                # Possibly cut off by the chunk boundary (a number decodes
+                # from any prefix of its digits); read on and retry.
+                more = file.read(chunk_size)
+                buffer, pos, eof = buffer[pos:] + more, 0, not more
+                continue
+            pos = end
+            if expect == "key":
+                key = value
+                expect = ":"
+            else:
+                yield key, value
+                expect = ","
+
+
+def compact_tree(obj):
+    """Apply ``sense_hook`` bottom-up to a decoded tree, as json would."""
+    kind = type(obj)
+    if kind is dict:
+        for key, value in obj.items():
+            if type(value) is dict or type(value) is list:
+                obj[key] = compact_tree(value)
+        return sense_hook(obj)
+    if kind is list:
+        for index, value in enumerate(obj):
+            if type(value) is dict or type(value) is list:
+                obj[index] = compact_tree(value)
+    return obj
+
+
+def compact_values(obj):
+    """
+    Compact the values of a decoded document, but never its root.
+
+    A words or cards mapping whose only keys happen to be "definition" or
+    "senses" must stay a mapping instead of turning into a sense or packet.
+    """
+    if type(obj) is dict:
+        for key, value in obj.items():
+            if type(value) is dict or type(value) is list:
+                obj[key] = compact_tree(value)
+        return obj
+    return compact_tree(obj)
+
+
+_MSGPACK_MAPS = frozenset(range(0x80, 0x90)) | {0xDE, 0xDF}  # Map type bytes
+
+
+class JsonSerializer:
+    """Compact JSON, through orjson when it is installed."""
+
+    name = "json"
+
+    def dumps(self, data):
+        if orjson is not None:
+            return orjson.dumps(data, default=json_default)
+        return json.dumps(
+            data, separators=(",", ":"), ensure_ascii=False, default=json_default
+        ).encode("utf-8")
+
+    def loads(self, raw):
+        if orjson is not None:
+            return compact_values(orjson.loads(raw))
+        text = raw.decode("utf-8")
+        if text.lstrip()[:1] == "{":
+            # Member by member, so the hook never sees the root object.
+            members = iter_json_items(io.StringIO(text), sense_hook, len(text))
+            return dict(members)
+        return json.loads(text, object_hook=sense_hook)
+
+    def iter_items(self, stream):
+        return iter_json_items(io.TextIOWrapper(stream, encoding="utf-8"), sense_hook)
+
+
+class MsgpackSerializer:
+    """MessagePack, requires the ``msgpack`` package."""
+
+    name = "msgpack"
+
+    def dumps(self, data):
+        return msgpack.packb(data, default=json_default, use_bin_type=True)
+
+    def loads(self, raw):
+        if raw[:1] and raw[0] in _MSGPACK_MAPS:
+            # Member by member, so the hook never sees the root map.
+            return dict(self.iter_items(io.BytesIO(raw)))
+        return msgpack.unpackb(raw, object_hook=sense_hook, raw=False)
+
+    def iter_items(self, stream):
+        unpacker = msgpack.Unpacker(stream, object_hook=sense_hook, raw=False)
+        for _ in range(unpacker.read_map_header()):
+            key = unpacker.unpack()
+            yield key, unpacker.unpack()
+
+
+class GzipCompression:
+    name = "gzip"
+    magic = b"\x1f\x8b"
+
+    def compress(self, raw):
+        return gzip.compress(raw, compresslevel=GZIP_LEVEL)
+
+    def reader(self, stream):
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+
+
+class ZstdCompression:
+    """Zstandard, requires the ``zstandard`` package."""
+
+    name = "zstd"
+    magic = b"\x28\xb5\x2f\xfd"
+
+    def compress(self, raw):
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+
+    def reader(self, stream):
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(stream))
+
+
+SERIALIZERS = {"json": JsonSerializer(), "msgpack": MsgpackSerializer()}
+COMPRESSIONS = {"gzip": GzipCompression(), "zstd": ZstdCompression()}
+
+# Packages each format component needs beyond the standard library.
+_REQUIREMENTS = {"msgpack": ("msgpack", msgpack), "zstd": ("zstandard", zstandard)}
+
+
+class FileFormat:
+    """
+    A serializer with optional compression.
+
+    Args:
+        serializer: One of ``SERIALIZERS``
+        compression: One of ``COMPRESSIONS``, or None
+    """
+
+    def __init__(self, serializer, compression=None):
+        self.serializer = serializer
+        self.compression = compression
+
+    @property
+    def name(self):
+        if self.compression is None:
+            return self.serializer.name
+        return f"{self.serializer.name}+{self.compression.name}"
+
+    def dumps(self, data):
+        """Encode ``data`` to the bytes written to disk."""
+        raw = self.serializer.dumps(data)
+        if self.compression is not None:
+            raw = self.compression.compress(raw)
+        return raw
+
+
+def get_format(name):
+    """
+    Look up a format by name, e.g. ``"msgpack+zstd"``.
+
+    Raises:
+        ValueError: If the name is unknown or its package is not installed
+    """
+    serializer_name, _, compression_name = name.strip().lower().partition("+")
+    for part in filter(None, (serializer_name, compression_name)):
+        package, module = _REQUIREMENTS.get(part, (None, True))
+        if module is None:
+            raise ValueError(f"Format {name!r} needs the {package!r} package")
+    try:
+        serializer = SERIALIZERS[serializer_name]
+        compression = COMPRESSIONS[compression_name] if compression_name else None
+    except KeyError:
+        raise ValueError(f"Unknown file format {name!r}") from None
+    return FileFormat(serializer, compression)
+
+
+def available_formats():
+    """Names of every format usable with the installed packages."""
+    names = []
+    for serializer in SERIALIZERS:
+        for compression in (None, *COMPRESSIONS):
+            name = f"{serializer}+{compression}" if compression else serializer
+            try:
+                get_format(name)
+            except ValueError:
+                continue
+            names.append(name)
+    return names
+
+
+def default_format():
+    """The format set in ``DICTIONARY_FILE_FORMAT``, compact JSON otherwise."""
+    name = os.environ.get(FORMAT_ENV, DEFAULT_FORMAT)
+    try:
+        return get_format(name)
+    except ValueError as e:
+        print(f"Error selecting file format: {e}; using {DEFAULT_FORMAT}")
+        return get_format(DEFAULT_FORMAT)
+
+
+def detect(stream):
+    """
+    Work out the format of a binary stream from its first bytes.
+
+    Args:
+        stream: Buffered binary file object positioned at the start
+
+    Returns:
+        tuple: ``(serializer, stream)`` where ``stream`` yields the
+        decompressed bytes
+
+    Raises:
+        ValueError: If the content needs a package that is not installed
+    """
+    head = stream.peek(4)[:4]
+    for compression in COMPRESSIONS.values():
+        if head.startswith(compression.magic):
+            if compression.name in _REQUIREMENTS:
+                package, module = _REQUIREMENTS[compression.name]
+                if module is None:
+                    raise ValueError(f"Reading this file needs the {package!r} package")
+            stream = compression.reader(stream)
+            head = stream.peek(1)[:1]
+            break
+    if not head or head[0] in _JSON_START:
+        return SERIALIZERS["json"], stream
+    if msgpack is None:
+        raise ValueError("Reading this file needs the 'msgpack' package")
+    return SERIALIZERS["msgpack"], stream
+
+
+def load(stream):
+    """Decode a whole file, whatever its format."""
+    serializer, stream = detect(stream)
+    return serializer.loads(stream.read())
+
+
+def iter_items(stream):
+    """Yield the ``(key, value)`` members of a file's top-level mapping."""
+    serializer, stream = detect(stream)
+    return serializer.iter_items(stream)
@@ -0,0 +1,278 @@
+"""
+Detection of UI event-loop stalls.
+
+A timer on the UI thread beats every ``BEAT_MS``. A helper thread watches
+the beats: when none has arrived for longer than the threshold, the event
+loop is blocked, and the helper samples the UI thread's Python stack until
+it recovers. Each stall is then logged with its duration and the frames the
+UI thread spent its time in, attributed to the innermost frame of the app's
+own code. At the end of the session a summary lists the stall count and the
+worst offenders.
+
+Native code that holds the GIL (large json, zlib or C-level loops) blocks
+the helper too, so it cannot take samples. Durations are therefore measured
+by the heartbeat itself: a beat that arrives late reports the gap, and the
+helper logs it, with or without samples.
+
+The detector itself does not use Qt; ``install`` drives it from a
+``QTimer``. Set ``DICTIONARY_STALL_MS`` to change the threshold, or to 0 to
+turn detection off.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque, namedtuple
+
+THRESHOLD_ENV = "DICTIONARY_STALL_MS"
+DEFAULT_THRESHOLD_MS = 250
+BEAT_MS = 50  # Heartbeat interval on the UI thread
+SAMPLE_MS = 20  # Stack sampling interval during a stall
+MAX_FRAMES = 8  # Frames logged per stall
+TOP_OFFENDERS = 5  # Offenders listed in the session summary
+
+SOURCE_ROOT = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SOURCE_ROOT)
+
+
+Frame = namedtuple("Frame", "filename name lineno")
+
+
+def _stack(frame):
+    """The stack of a live frame as hashable ``Frame``s, outermost first."""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(Frame(code.co_filename, code.co_name, frame.f_lineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _location(frame, line=True):
+    """``function (path:line)`` with the path relative to the project."""
+    path = frame.filename
+    if path.startswith(PROJECT_ROOT):
+        path = os.path.relpath(path, PROJECT_ROOT)
+    if line:
+        path = f"{path}:{frame.lineno}"
+    return f"{frame.name} ({path})"
+
+
+def offender(stack):
+    """
+    The frame a stall is blamed on.
+
+    That is the innermost frame in the app's own code, since library frames
+    (json, requests, Qt bindings) only say how the time was spent. Falls
+    back to the innermost frame, or None when the UI thread was not running
+    Python code at all (blocked inside Qt).
+    """
+    for frame in reversed(stack):
+        if frame.filename.startswith(SOURCE_ROOT):
+            return frame
+    return stack[-1] if stack else None
+
+
+class Stall:
+    """One stall of the event loop with the stacks sampled during it."""
+
+    def __init__(self, started):
+        self.started = started
+        self.duration = 0.0
+        self.samples = Counter()  # Stack (tuple of Frame, outermost first) -> count
+
+    def dominant_stack(self):
+        if not self.samples:
+            return ()
+        return self.samples.most_common(1)[0][0]
+
+    def culprit(self):
+        """``function (path)`` the stall is blamed on, without the line."""
+        frame = offender(self.dominant_stack())
+        if frame is None:
+            # The helper never got to run while the UI thread was blocked.
+            return "GIL held / native code"
+        return _location(frame, line=False)
+
+    def describe(self, ongoing=False):
+        stack = self.dominant_stack()
+        share = self.samples[stack] / max(sum(self.samples.values()), 1)
+        verb = "has been stalled" if ongoing else "stalled"
+        lines = [
+            f"UI {verb} for {self.duration * 1000:.0f} ms in {self.culprit()}"
+            f" ({share:.0%} of {sum(self.samples.values())} samples):"
+        ]
+        lines.extend(f"    {_location(frame)}" for frame in stack[-MAX_FRAMES:])
+        return "\n".join(lines)
+
+
+class StallDetector:
+    """
+    Watches heartbeats from the UI thread and samples it while they stop.
+
+    Call ``beat`` from the UI thread's event loop every ``beat_interval``
+    seconds, then ``start``. ``stop`` ends the session and prints the
+    summary.
+
+    Args:
+        threshold (float): Seconds without a heartbeat that count as a stall
+        beat_interval (float): Expected seconds between heartbeats
+        sample_interval (float): Seconds between stack samples in a stall
+        log (callable): Receives each stall report and the summary
+    """
+
+    def __init__(
+        self,
+        threshold=DEFAULT_THRESHOLD_MS / 1000,
+        beat_interval=BEAT_MS / 1000,
+        sample_interval=SAMPLE_MS / 1000,
+        log=print,
+    ):
+        self.threshold = threshold
+        self.beat_interval = beat_interval
+        self.sample_interval = sample_interval
+        self.log = log
+        self.stalls = []
+        self._last_beat = time.monotonic()
+        self._gaps = deque()  # (last beat, late beat) pairs, filled by beat
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _is_stall(self, last_beat, now):
+        """Whether no beat between ``last_beat`` and ``now`` is a stall."""
+        return now - last_beat - self.beat_interval >= self.threshold
+
+    def beat(self):
+        """Record a heartbeat; call on the watched thread only."""
+        now = time.monotonic()
+        if self._is_stall(self._last_beat, now):
+            self._gaps.append((self._last_beat, now))
+        self._last_beat = now
+
+    def start(self):
+        """Start watching the calling thread."""
+        self._thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="stall-detector", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, report=True):
+        """
+        Stop watching and print the session summary.
+
+        A stall still in progress is logged and counted with its duration
+        so far.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if report and self.stalls:
+            self.log(self.summary())
+
+    def _watch(self):
+        stall = None
+        while not self._stop.wait(self.sample_interval):
+            # Read before closing gaps: a beat arriving in between either
+            # queued the gap that closes the stall or is seen next time.
+            last_beat = self._last_beat
+            stall = self._close_gaps(stall)
+            if stall is not None and stall.started != last_beat:
+                # A beat arrived, but late by less than the threshold.
+                stall = None
+            if not self._is_stall(last_beat, time.monotonic()):
+                continue
+            if stall is None or stall.started != last_beat:
+                stall = Stall(last_beat)
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                stall.samples[_stack(frame)] += 1
+            del frame
+        last_beat = self._last_beat
+        stall = self._close_gaps(stall)
+        if stall is not None and stall.started == last_beat:
+            stall.duration = time.monotonic() - stall.started - self.beat_interval
+            self.stalls.append(stall)
+            self.log(stall.describe(ongoing=True))
+
+    def _close_gaps(self, stall):
+        """
+        Record the stalls the heartbeat reported since the last check.
+
+        Returns:
+            Stall: ``stall`` if it is still in progress, otherwise None
+        """
+        while self._gaps:
+            started, ended = self._gaps.popleft()
+            if stall is not None and stall.started == started:
+                closed, stall = stall, None
+            else:
+                # Not sampled: the helper was blocked along with the UI.
+                closed = Stall(started)
+            closed.duration = ended - started - self.beat_interval
+            self.stalls.append(closed)
+            self.log(closed.describe())
+        return stall
+
+    def summary(self):
+        """Stall count, total and worst duration and the worst offenders."""
+        total = sum(stall.duration for stall in self.stalls)
+        worst = max(stall.duration for stall in self.stalls)
+        by_culprit = {}
+        for stall in self.stalls:
+            count, seconds, longest = by_culprit.get(stall.culprit(), (0, 0.0, 0.0))
+            by_culprit[stall.culprit()] = (
+                count + 1,
+                seconds + stall.duration,
+                max(longest, stall.duration),
+            )
+        lines = [
+            f"UI stalls this session: {len(self.stalls)}, {total * 1000:.0f} ms in"
+            f" total, worst {worst * 1000:.0f} ms"
+        ]
+        ranked = sorted(by_culprit.items(), key=lambda item: -item[1][1])
+        for culprit, (count, seconds, longest) in ranked[:TOP_OFFENDERS]:
+            lines.append(
+                f"    {count:>3}x {seconds * 1000:>7.0f} ms total,"
+                f" {longest * 1000:>6.0f} ms max  {culprit}"
+            )
+        return "\n".join(lines)
+
+
+def threshold_from_env():
+    """The stall threshold in seconds from ``DICTIONARY_STALL_MS``; 0 is off."""
+    value = os.environ.get(THRESHOLD_ENV)
+    try:
+        return max(0.0, float(value)) / 1000 if value else DEFAULT_THRESHOLD_MS / 1000
+    except ValueError:
+        print(f"Error: {THRESHOLD_ENV}={value!r} is not a number of milliseconds")
+        return DEFAULT_THRESHOLD_MS / 1000
+
+
+def install(app, threshold=None):
+    """
+    Watch the event loop of a ``QApplication``.
+
+    The summary is printed when the application quits.
+
+    Returns:
+        StallDetector: The running detector, or None if detection is off
+    """
+    from PyQt6.QtCore import QTimer
+
+    threshold = threshold_from_env() if threshold is None else threshold
+    if not threshold:
+        return None
+    detector = StallDetector(threshold)
+    timer = QTimer(app)
+    timer.timeout.connect(detector.beat)
+    timer.start(BEAT_MS)
+    app.aboutToQuit.connect(detector.stop)
+    detector.start()
+    return detector
@@ -0,0 +1,279 @@
+"""
+Persistence helpers for the word and flashcard data files.
+
+Several windows and processes (the dictionary window, the review window, a
+second app instance, the command-line tools) may use the same files. Writers
+take an advisory lock, merge their changes into whatever is on disk and
+replace the file atomically, so readers never see a partial file and no
+writer silently discards another's work.
+
+Files are encoded with the format from ``serializers.default_format`` and
+read in whatever format they were written in.
+
+This module is kept free of Qt imports so that the command-line tools can
+share it with the GUI.
+"""
+
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from src import serializers
+from src.serializers import default_format
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_MISSING = object()
+
+
+def resource_path(relative_path):
+    """Get absolute path to resource, works for dev and for PyInstaller"""
+    try:
+        # PyInstaller creates a temp folder and stores path in _MEIPASS
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path).replace("\\", "/")
+
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive advisory lock for ``path`` (via ``path.lock``)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "a+") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def file_signature(path):
+    """Return a value that changes whenever ``path`` is rewritten."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def write_atomic(path, data, file_format=None):
+    """Write ``data`` to a temporary file and move it over ``path``."""
+    raw = (file_format or default_format()).dumps(data)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(raw)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+LOAD_CHUNK = 2000  # Entries handed over at a time while streaming a file
+
+
+def chunked(pairs, size):
+    """Group ``(key, value)`` pairs into dicts of up to ``size`` entries."""
+    chunk = {}
+    for key, value in pairs:
+        chunk[key] = value
+        if len(chunk) >= size:
+            yield chunk
+            chunk = {}
+    if chunk:
+        yield chunk
+
+
+def read_data(path):
+    """Read a data file in any supported format, senses as compact records."""
+    with open(path, "rb") as file:
+        return serializers.load(file)
+
+
+def diff_mappings(old, new, ignore=()):
+    """
+    Compare two mappings.
+
+    Returns:
+        tuple: ``(changed, removed)`` - entries of ``new`` that differ from
+        ``old`` and keys of ``old`` missing from ``new``, skipping ``ignore``
+    """
+    changed = {
+        key: value
+        for key, value in new.items()
+        if key not in ignore and old.get(key, _MISSING) != value
+    }
+    removed = {key for key in old if key not in new and key not in ignore}
+    return changed, removed
+
+
+class SharedStore:
+    """
+    A JSON mapping file shared by several writers.
+
+    The store remembers the file version it last read or wrote. On ``write``
+    only the keys the caller changed (``dirty``) are applied on top of the
+    current file, and changes other writers made since are handed back so the
+    caller can apply them. ``poll`` does the same without writing.
+
+    Args:
+        path (str): Path to the JSON file
+        file_format (FileFormat): Format used when writing, see
+            ``serializers``; reading accepts any format
+    """
+
+    def __init__(self, path, file_format=None):
+        self.path = path
+        self.file_format = file_format or default_format()
+        self.signature = None
+        # Whether the caller holds every key of the ``signature`` version.
+        self.loaded = False
+
+    def read(self):
+        """Read the whole mapping; a missing file reads as empty."""
+        signature = file_signature(self.path)
+        data = read_data(self.path) if signature else {}
+        self.signature = signature
+        self.loaded = True
+        return data
+
+    def stream(self):
+        """
+        Yield ``(key, value)`` pairs while the file is being parsed.
+
+        Until the caller sets ``loaded`` once it has taken in every pair,
+        writes merge into the file instead of replacing it, so saving a
+        partially loaded mapping cannot drop the rest.
+        """
+        self.loaded = False
+        try:
+            file = open(self.path, "rb")
+        except FileNotFoundError:
+            self.signature = None
+            return
+        with file:
+            st = os.fstat(file.fileno())
+            self.signature = st.st_mtime_ns, st.st_size, st.st_ino
+            yield from serializers.iter_items(file)
+
+    def changed_on_disk(self):
+        return file_signature(self.path) != self.signature
+
+    def poll(self, data, dirty=()):
+        """
+        Return ``(changed, removed)`` made by others relative to ``data``.
+
+        Keys in ``dirty`` are local edits that have not been saved yet and
+        are left out of the comparison.
+        """
+        if not self.changed_on_disk():
+            return {}, set()
+        return diff_mappings(data, self.read(), ignore=dirty)
+
+    def read_changes(self, data, dirty, since):
+        """
+        ``poll`` without updating the store, so it can run off the UI thread.
+
+        Args:
+            data (dict): A copy of the caller's mapping
+            dirty (set): A copy of its unsaved keys
+            since: ``signature`` when the copies were taken
+
+        Returns:
+            tuple: ``(signature, changed, removed)`` for the version read;
+            pass ``since`` and ``signature`` to ``accept`` before applying
+        """
+        signature = file_signature(self.path)
+        if signature == since:
+            return since, {}, set()
+        disk = read_data(self.path) if signature else {}
+        return (signature, *diff_mappings(data, disk, ignore=dirty))
+
+    def accept(self, since, signature):
+        """
+        Adopt the version ``read_changes`` read.
+
+        Returns:
+            bool: False if the store was read or written in the meantime;
+            a write has then already handed back the changes
+        """
+        if self.signature != since:
+            return False
+        self.signature = signature
+        return True
+
+    def write(self, data, dirty=None):
+        """
+        Save ``data``, merging with concurrent edits.
+
+        Args:
+            data (dict): The caller's full mapping
+            dirty (set): Keys the caller added, changed or removed since the
+                last read; None replaces the file with ``data`` outright
+
+        Returns:
+            tuple: ``(changed, removed)`` made by others, as for ``poll``
+        """
+        external = ({}, set())
+        with locked(self.path):
+            on_disk = file_signature(self.path)
+            if (
+                dirty is not None
+                and on_disk is not None
+                and (on_disk != self.signature or not self.loaded)
+            ):
+                disk = read_data(self.path)
+                external = diff_mappings(data, disk, ignore=dirty)
+                merged = dict(disk)
+                for key in dirty:
+                    value = data.get(key, _MISSING)
+                    if value is _MISSING:
+                        merged.pop(key, None)
+                    else:
+                        merged[key] = value
+                data = merged
+            write_atomic(self.path, data, self.file_format)
+            self.signature = file_signature(self.path)
+        # Applying ``external`` brings the caller up to date with the file.
+        self.loaded = True
+        return external
+
+
+def load_words(path):
+    """
+    Load the words mapping from a JSON file.
+
+    Args:
+        path (str): Path to the words file
+
+    Returns:
+        dict: Mapping of words to their packets, empty if the file is missing
+    """
+    if not os.path.exists(path):
+        return {}
+    return read_data(path)
+
+
+def save_words(path, words_data):
+    """Write the words mapping to ``path``, creating its directory if needed."""
+    with locked(path):
+        write_atomic(path, words_data)
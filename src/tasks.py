@@ -0,0 +1,197 @@
+"""
+Background task scheduling for the Qt windows.
+
+Work is split into lanes (network, audio, disk), each backed by its own
+``QThreadPool`` so that a long playback cannot hold up a lookup. Tasks are
+identified by a key: submitting a key that is already queued or running
+attaches to the existing task instead of starting a new one. Tasks can be
+tagged with a group and cancelled together, e.g. everything tied to the
+currently selected word when the selection changes.
+"""
+
+from functools import partial
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+NETWORK = "network"
+AUDIO = "audio"
+DISK = "disk"
+
+# Maximum concurrent tasks per lane.
+DEFAULT_LANES = {NETWORK: 4, AUDIO: 1, DISK: 1}
+
+# Higher values are dequeued first within a lane.
+PRIORITY_INTERACTIVE = 10
+PRIORITY_PREFETCH = 0
+
+
+class TaskSignals(QObject):
+    finished = pyqtSignal(object, object)
+    error = pyqtSignal(object, str)
+    progress = pyqtSignal(object, object)
+
+
+class Task(QRunnable):
+    """A keyed unit of work; results are delivered on the UI thread."""
+
+    def __init__(self, key, lane, func, args, priority, group):
+        super().__init__()
+        # The scheduler keeps the reference; Qt must not delete it.
+        self.setAutoDelete(False)
+        self.key = key
+        self.lane = lane
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.group = group
+        self.cancelled = False
+        self.finished_callbacks = []
+        self.error_callbacks = []
+        self.progress_callbacks = []
+        self.signals = TaskSignals()
+
+    def add_callbacks(self, on_finished=None, on_error=None, on_progress=None):
+        if on_finished:
+            self.finished_callbacks.append(on_finished)
+        if on_error:
+            self.error_callbacks.append(on_error)
+        if on_progress:
+            self.progress_callbacks.append(on_progress)
+
+    def report(self, value):
+        """
+        Deliver a partial result to the ``on_progress`` callbacks.
+
+        Returns:
+            bool: False once the task is cancelled, so the work can stop early
+        """
+        if self.cancelled:
+            return False
+        self.signals.progress.emit(self, value)
+        return True
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            output = self.func(*self.args)
+        except Exception as e:
+            self.signals.error.emit(self, str(e))
+            return
+        self.signals.finished.emit(self, output)
+
+
+class TaskScheduler(QObject):
+    """Prioritised, deduplicating and cancellable task runner."""
+
+    def __init__(self, parent=None, lanes=None):
+        super().__init__(parent)
+        self.pools = {}
+        for lane, threads in (lanes or DEFAULT_LANES).items():
+            pool = QThreadPool(self)
+            pool.setMaxThreadCount(threads)
+            self.pools[lane] = pool
+        self.in_flight = {}
+
+    def submit(
+        self,
+        lane,
+        key,
+        func,
+        *args,
+        priority=PRIORITY_INTERACTIVE,
+        group=None,
+        on_finished=None,
+        on_error=None,
+        on_progress=None,
+    ):
+        """
+        Run ``func(*args)`` on ``lane`` unless ``key`` is already in flight.
+
+        When ``on_progress`` is given, ``func`` is also passed the task's
+        ``report`` method as a ``report`` keyword argument to hand over
+        partial results as it goes.
+
+        Args:
+            lane (str): Lane name, e.g. NETWORK
+            key (hashable): Identity used for deduplication and cancellation
+            func (callable): Function executed on a pool thread
+            priority (int): Queue priority within the lane
+            group (hashable): Optional tag for ``cancel_group``
+            on_finished (callable): Called with the result on the UI thread
+            on_error (callable): Called with the error message on the UI thread
+            on_progress (callable): Called with each reported partial result
+                on the UI thread
+
+        Returns:
+            Task: The new or already running task
+        """
+        task = self.in_flight.get(key)
+        if task is not None and not task.cancelled:
+            task.add_callbacks(on_finished, on_error, on_progress)
+            if priority > task.priority:
+                # The more urgent request owns the task from now on.
+                task.group = group
+                task.priority = priority
+                if self.pools[task.lane].tryTake(task):
+                    # Still queued: requeue it ahead of lower priority work.
+                    self.pools[task.lane].start(task, priority)
+            return task
+
+        task = Task(key, lane, func, args, priority, group)
+        if on_progress:
+            task.func = partial(func, report=task.report)
+        task.add_callbacks(on_finished, on_error, on_progress)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.error.connect(self._on_error)
+        task.signals.progress.connect(self._on_progress)
+        self.in_flight[key] = task
+        self.pools[lane].start(task, priority)
+        return task
+
+    def is_pending(self, key):
+        task = self.in_flight.get(key)
+        return task is not None and not task.cancelled
+
+    def cancel(self, key):
+        """Cancel a task; queued tasks are dropped, running ones are ignored."""
+        task = self.in_flight.pop(key, None)
+        if task is None:
+            return False
+        task.cancelled = True
+        self.pools[task.lane].tryTake(task)
+        return True
+
+    def cancel_group(self, group):
+        """Cancel every in-flight task tagged with ``group``."""
+        for key, task in list(self.in_flight.items()):
+            if task.group == group:
+                self.cancel(key)
+
+    def cancel_all(self):
+        for key in list(self.in_flight):
+            self.cancel(key)
+
+    def _release(self, task):
+        if self.in_flight.get(task.key) is task:
+            del self.in_flight[task.key]
+
+    def _on_finished(self, task, output):
+        self._release(task)
+        if task.cancelled:
+            return
+        for callback in task.finished_callbacks:
+            callback(output)
+
+    def _on_progress(self, task, value):
+        if task.cancelled:
+            return
+        for callback in task.progress_callbacks:
+            callback(value)
+
+    def _on_error(self, task, message):
+        self._release(task)
+        if task.cancelled:
+            return
+        for callback in task.error_callbacks:
+            callback(message)
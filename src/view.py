@@ -1,5 +1,4 @@
 import os
-import json
 import webbrowser
 from PyQt6.QtWidgets import (
     QMainWindow,
@@ -15,14 +14,13 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QGraphicsOpacityEffect,
     QHeaderView,
+    QComboBox,
+    QInputDialog,
 )
 from PyQt6.QtCore import (
     QPropertyAnimation,
-    QRunnable,
-    QThreadPool,
-    pyqtSignal,
-    QObject,
     QSize,
+    QTimer,
     Qt,
     QEasingCurve,
     pyqtProperty,
@@ -39,35 +37,33 @@ from PyQt6.QtGui import (
     QPainterPath,
 )
 from src.backend import (
+    audio_urls,
     get_word_packet,
     resource_path,
-    play_word,
+    play_audio,
+    pronunciation,
     search_oxford_dictionary,
     get_stylesheet,
 )
+from src.storage import LOAD_CHUNK, SharedStore, chunked
+from src.watcher import FileChangeWatcher
+from src.tasks import AUDIO, DISK, NETWORK, PRIORITY_PREFETCH, TaskScheduler
+from src.prefetch import Prefetcher, audio_key
+from src.refresh import PacketRefresher, metadata_path
+from src.backup import WORDS, SnapshotStore, backup_dir
+from src.headwords import HeadwordIndex, headword, index_key
 from src.anki import FlashcardApp
+from src.decks import DEFAULT_DECK, DeckRegistry
 
+REFRESH_DELAY = 30_000  # ms after start-up before stored packets are re-validated
+REFRESH_INTERVAL = 10 * 60_000  # ms between background refresh runs
 
-# Worker signals to communicate between the worker thread and the UI thread.
-class WorkerSignals(QObject):
-    finished = pyqtSignal(str, object)
-    error = pyqtSignal(str)
 
-
-class Worker(QRunnable):
-    def __init__(self, word: str, func):
-        super().__init__()
-        self.word = word
-        self.func = func
-        self.signals = WorkerSignals()
-
-    def run(self):
-        try:
-            output = self.func(self.word)
-        except Exception as e:
-            self.signals.error.emit(str(e))
-            return
-        self.signals.finished.emit(self.word, output)
+def stream_words(store, report):
+    """Read ``store`` piecewise, reporting chunks of words as they parse."""
+    for chunk in chunked(store.stream(), LOAD_CHUNK):
+        if not report(chunk):
+            break
 
 
 class ThemeToggleButton(QPushButton):
@@ -282,16 +278,34 @@ class ThemeToggleButton(QPushButton):
 
 
 class DictionaryApp(QMainWindow):
-    def __init__(self, json_path=resource_path("data/words.json")):
+    def __init__(self, json_path=None, deck=DEFAULT_DECK):
         super().__init__()
-        self.json_path = json_path
+        self.registry = DeckRegistry()
+        # An explicit words file is not part of any deck.
+        self.deck = deck if json_path is None else None
+        self.json_path = json_path or self.registry.words_path(deck)
+        self.anki_app = None
         self.setObjectName("dictionary-app")
         self.setWindowTitle("Dictionary Application")
         self.setMinimumSize(800, 600)
         self.words_data = {}  # Holds words and their corresponding packets.
-        self.threadpool = QThreadPool()
-        self.load_data()
+        self.headwords = HeadwordIndex()  # Finds stored words from user input
+        self.scheduler = TaskScheduler(self)
+        self.prefetcher = Prefetcher(self.scheduler)
+        self.loading = False
         self.init_ui()
+        self.start_loading()
+
+        self.file_watcher = FileChangeWatcher(self)
+        self.file_watcher.changed.connect(self.check_external_changes)
+        self.file_watcher.watch(self.json_path)
+
+        self.refresher = PacketRefresher(metadata_path(self.json_path))
+        self.backups = SnapshotStore(backup_dir(self.json_path))
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_packets)
+        self.refresh_timer.start(REFRESH_INTERVAL)
+        QTimer.singleShot(REFRESH_DELAY, self.refresh_packets)
 
     def init_ui(self):
         # Main container widget and layout.
@@ -318,6 +332,12 @@ class DictionaryApp(QMainWindow):
 
         left_layout.addLayout(h_layout)
 
+        # Deck selector; every deck keeps its own words and flashcards.
+        self.deck_selector = QComboBox()
+        self.deck_selector.activated.connect(self.deck_selected)
+        left_layout.addWidget(self.deck_selector)
+        self.populate_deck_selector()
+
         # Search mechanism for filtering added words.
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("Search words...")
@@ -325,7 +345,6 @@ class DictionaryApp(QMainWindow):
         left_layout.addWidget(self.search_edit)
 
         self.word_list = QListWidget()
-        self.word_list.addItems(self.words_data.keys())
         self.word_list.currentItemChanged.connect(self.display_word_packet)
         left_layout.addWidget(self.word_list)
 
@@ -414,8 +433,62 @@ class DictionaryApp(QMainWindow):
         if self.anki_app:
             self.anki_app.setStyleSheet(get_stylesheet(theme))
 
+    def populate_deck_selector(self):
+        """List the decks with due counts taken from the deck index."""
+        self.deck_selector.clear()
+        for name, due in self.registry.due_counts().items():
+            self.deck_selector.addItem(f"{name} ({due} due)", name)
+            if name == self.deck:
+                self.deck_selector.setCurrentIndex(self.deck_selector.count() - 1)
+        self.deck_selector.addItem("New deck...", None)
+
+    def deck_selected(self, index):
+        name = self.deck_selector.itemData(index)
+        if name is None:
+            name, ok = QInputDialog.getText(self, "New Deck", "Deck name:")
+            if not ok or not name.strip():
+                self.populate_deck_selector()
+                return
+            try:
+                name = self.registry.create(name)
+            except (ValueError, OSError) as e:
+                QMessageBox.warning(self, "Error", f"Error creating deck: {e}")
+                self.populate_deck_selector()
+                return
+        if name != self.deck:
+            self.open_deck(name)
+        else:
+            self.populate_deck_selector()
+
+    def open_deck(self, name):
+        """Unload the current deck and load ``name`` in its place."""
+        # Results of work started for the old deck must not leak into the new one.
+        self.scheduler.cancel_group("selection")
+        self.scheduler.cancel_group("deck")
+        self.scheduler.cancel(("refresh",))
+        self.prefetcher.cancel()
+        self.add_word_button.setEnabled(True)
+        if self.anki_app:
+            self.anki_app.close()
+            self.anki_app = None
+
+        self.deck = name
+        self.json_path = self.registry.words_path(name)
+        self.start_loading()
+        self.file_watcher.watch(self.json_path)
+        self.refresher = PacketRefresher(metadata_path(self.json_path))
+        self.backups = SnapshotStore(backup_dir(self.json_path))
+        self.populate_deck_selector()
+
     def run_anki(self):
-        self.anki_app = FlashcardApp()
+        # A words file outside any deck is reviewed with its own cards.
+        self.anki_app = FlashcardApp(
+            self.scheduler,
+            self.deck,
+            self.registry,
+            words_path=self.json_path if self.deck is None else None,
+        )
+        self.anki_app.closed.connect(self.populate_deck_selector)
         self.toggle_dark_mode()
         self.anki_app.show()
 
@@ -429,27 +502,185 @@ class DictionaryApp(QMainWindow):
         if current_item:
             self.remove_word()
 
-    def load_data(self):
-        """Load words data from the JSON file located in the root directory."""
+    def start_loading(self):
+        """
+        Load the words file in the background.
+
+        Words are added to the list in chunks as they are parsed, so the
+        window is usable before a large file has been read completely.
+        """
         if os.path.isdir(resource_path("data")) is False:
             os.mkdir(resource_path("data"))
-        if os.path.exists(self.json_path):
-            try:
-                with open(self.json_path, "r") as file:
-                    self.words_data = json.load(file)
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Error loading data: {e}")
-                self.words_data = {}
-        else:
-            self.words_data = {}
+        self.store = SharedStore(self.json_path)
+        self.dirty_words = set()
+        self.words_data = {}
+        self.headwords.clear()
+        self.word_list.clear()
+        self.loading = True
+        self.update_title()
+        self.scheduler.submit(
+            DISK,
+            ("load", self.json_path),
+            stream_words,
+            self.store,
+            group="deck",
+            on_progress=self.on_words_loaded,
+            on_finished=self.on_loading_finished,
+            on_error=self.on_loading_failed,
+        )
+
+    def on_words_loaded(self, chunk):
+        # Words already present were added, changed or removed meanwhile.
+        new_words = [word for word in chunk if word not in self.words_data]
+        for word in new_words:
+            self.words_data[word] = chunk[word]
+            self.headwords.add(word)
+        first = self.word_list.count()
+        self.word_list.addItems(new_words)
+        search_text = self.search_edit.text().lower()
+        if search_text:
+            for row in range(first, self.word_list.count()):
+                item = self.word_list.item(row)
+                item.setHidden(search_text not in item.text().lower())
+        self.update_title()
+
+    def on_loading_finished(self, _):
+        self.loading = False
+        self.store.loaded = True
+        self.update_title()
+        # Pick up anything written while the file was being read.
+        self.check_external_changes()
+
+    def on_loading_failed(self, message):
+        self.loading = False
+        self.update_title()
+        QMessageBox.warning(self, "Error", f"Error loading data: {message}")
+
+    def update_title(self):
+        title = "Dictionary Application"
+        if self.loading:
+            title += f" (loading, {len(self.words_data):,} words)"
+        self.setWindowTitle(title)
 
     def save_data(self):
         """Save the current words data to the JSON file in the root directory."""
+        dirty = self.dirty_words
+        if self.store.path != self.json_path:
+            # Pointed at another file: everything in memory is authoritative.
+            self.store = SharedStore(self.json_path)
+            dirty = None
         try:
-            with open(self.json_path, "w") as file:
-                json.dump(self.words_data, file, indent=4)
+            changed, removed = self.store.write(self.words_data, dirty)
+            self.dirty_words = set()
+            self.apply_external_changes(changed, removed)
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error saving data: {e}")
+            return
+        if self.deck is not None:
+            try:
+                self.registry.record_words(self.deck, self.words_data)
+            except OSError as e:
+                print(f"Error updating deck index: {e}")
+        self.backup_words()
+
+    def backup_words(self):
+        """Snapshot the saved words in the background."""
+        if self.backups is None:
+            return
+        # After saving, words_data matches the file, even mid-load.
+        key = ("backup", self.backups.directory, WORDS)
+        # A queued snapshot of older data is superseded by this one.
+        self.scheduler.cancel(key)
+        self.scheduler.submit(
+            DISK,
+            key,
+            self.backups.snapshot,
+            WORDS,
+            dict(self.words_data),
+            priority=PRIORITY_PREFETCH,
+            on_error=lambda message: print(f"Error backing up words: {message}"),
+        )
+
+    def check_external_changes(self):
+        """Pick up words saved by other windows or processes."""
+        store = self.store
+        key = ("poll", store.path)
+        if self.loading or not store.changed_on_disk():
+            # Loading checks once every word is in.
+            return
+        if self.scheduler.is_pending(key):
+            # on_words_polled checks again once that poll is done.
+            return
+        since = store.signature
+        # Errors mean a non-atomic writer was caught mid-write; the next
+        # change event retries.
+        self.scheduler.submit(
+            DISK,
+            key,
+            store.read_changes,
+            dict(self.words_data),
+            set(self.dirty_words),
+            since,
+            on_finished=lambda result: self.on_words_polled(store, since, result),
+        )
+
+    def on_words_polled(self, store, since, result):
+        """Apply a poll's changes on the UI thread, unless they are stale."""
+        signature, changed, removed = result
+        if store is not self.store or not store.accept(since, signature):
+            return
+        # Words edited since the copy was taken keep the local version.
+        changed = {w: p for w, p in changed.items() if w not in self.dirty_words}
+        self.apply_external_changes(changed, removed - self.dirty_words)
+        if store.changed_on_disk():
+            self.check_external_changes()
+
+    def apply_external_changes(self, changed, removed):
+        """Update the data and the list for words changed elsewhere."""
+        if not changed and not removed:
+            return
+        search_text = self.search_edit.text().lower()
+        for word, packet in changed.items():
+            if word not in self.words_data:
+                self.word_list.addItem(word)
+                item = self.word_list.item(self.word_list.count() - 1)
+                item.setHidden(search_text not in word.lower())
+                self.headwords.add(word)
+            self.words_data[word] = packet
+        for word in removed:
+            self.words_data.pop(word, None)
+            self.headwords.discard(word)
+            for item in self.word_list.findItems(word, Qt.MatchFlag.MatchExactly):
+                self.word_list.takeItem(self.word_list.row(item))
+        current_item = self.word_list.currentItem()
+        if current_item and current_item.text() in changed:
+            self.populate_table(self.words_data[current_item.text()])
+
+    def refresh_packets(self):
+        """Re-validate the oldest stored packets in the background."""
+        if self.loading or not self.words_data:
+            return
+        self.scheduler.submit(
+            NETWORK,
+            ("refresh",),
+            self.refresher.run,
+            dict(self.words_data),
+            priority=PRIORITY_PREFETCH,
+            on_finished=self.on_packets_refreshed,
+        )
+
+    def on_packets_refreshed(self, changed):
+        """Apply packets that changed upstream to the store and the view."""
+        updated = [word for word in changed if word in self.words_data]
+        if not updated:
+            return
+        for word in updated:
+            self.words_data[word] = changed[word]
+        self.dirty_words.update(updated)
+        self.save_data()
+        current_item = self.word_list.currentItem()
+        if current_item and current_item.text() in changed:
+            self.populate_table(self.words_data[current_item.text()])
 
     def filter_word_list(self, text):
         """Filter the words in the list based on the search text."""
@@ -462,15 +693,36 @@ class DictionaryApp(QMainWindow):
         Display the details of the selected word's packet in the table.
         A simple fade-in animation is applied for a smooth transition.
         """
+        # Work started for the previous selection is no longer wanted.
+        self.scheduler.cancel_group("selection")
+        self.oxford_dictionary_button.setEnabled(True)
+        self.play_sound_button.setEnabled(True)
         if current:
             word = current.text()
             packet = self.words_data.get(word, [])
             self.word_label.setText(f"Details for: {word}")
             self.populate_table(packet)
+            self.prefetcher.warm_words(
+                [word] + self.neighbour_words(current), self.words_data
+            )
         else:
             self.word_label.setText("Word Details:")
             self.details_table.setRowCount(0)
 
+    def neighbour_words(self, item):
+        """Return the visible words directly below and above ``item``."""
+        words = []
+        row = self.word_list.row(item)
+        for step in (1, -1):
+            index = row + step
+            while 0 <= index < self.word_list.count():
+                neighbour = self.word_list.item(index)
+                if not neighbour.isHidden():
+                    words.append(neighbour.text())
+                    break
+                index += step
+        return words
+
     def populate_table(self, packet):
         """Populate the table widget with the word packet details."""
         self.details_table.setRowCount(len(packet))
@@ -500,22 +752,42 @@ class DictionaryApp(QMainWindow):
         Retrieve a new word's packet using get_word_packet in a separate thread,
         then add it to the dictionary data and update both the UI and JSON file.
         """
-        word = self.add_word_edit.text().strip()
+        word = headword(self.add_word_edit.text())
         if not word:
             QMessageBox.information(self, "Input Error", "Please enter a valid word.")
             return
-        if word in self.words_data:
+        stored = self.headwords.resolve(word)
+        if stored is not None and index_key(stored) == index_key(word):
             QMessageBox.information(
-                self, "Duplicate", f"'{word}' is already in the dictionary."
+                self, "Duplicate", f"'{stored}' is already in the dictionary."
             )
+            self.select_word(stored)
             return
+        if stored is not None:
+            # Probably an inflected form, but "building" is not just "build".
+            answer = QMessageBox.question(
+                self,
+                "Duplicate",
+                f"'{word}' looks like a form of '{stored}', which is already in "
+                f"the dictionary. Add '{word}' anyway?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No,
+            )
+            if answer != QMessageBox.StandardButton.Yes:
+                self.select_word(stored)
+                return
 
         # Disable the add button while fetching to prevent multiple clicks.
         self.add_word_button.setEnabled(False)
-        worker = Worker(word, get_word_packet)
-        worker.signals.finished.connect(self.on_word_packet_fetched)
-        worker.signals.error.connect(self.on_word_packet_error)
-        self.threadpool.start(worker)
+        self.scheduler.submit(
+            NETWORK,
+            ("packet", word),
+            get_word_packet,
+            word,
+            group="deck",
+            on_finished=lambda packet: self.on_word_packet_fetched(word, packet),
+            on_error=self.on_word_packet_error,
+        )
 
     def on_word_packet_fetched(self, word, packet):
         """Handle the fetched word packet."""
@@ -524,10 +796,21 @@ class DictionaryApp(QMainWindow):
             QMessageBox.warning(self, "Not Found", f"No definition found for '{word}'.")
             return
         self.words_data[word] = packet
+        self.headwords.add(word)
+        self.dirty_words.add(word)
         self.word_list.addItem(word)
         self.save_data()
         self.add_word_edit.clear()
 
+    def select_word(self, word):
+        """Select ``word`` in the list, clearing a search that hides it."""
+        items = self.word_list.findItems(word, Qt.MatchFlag.MatchExactly)
+        if not items:
+            return
+        if items[0].isHidden():
+            self.search_edit.clear()
+        self.word_list.setCurrentItem(items[0])
+
     def on_word_packet_error(self, error_message):
         """Handle any error during the word packet retrieval."""
         self.add_word_button.setEnabled(True)
@@ -558,15 +841,25 @@ class DictionaryApp(QMainWindow):
             self.word_list.takeItem(row)
             if word in self.words_data:
                 del self.words_data[word]
+                self.headwords.discard(word)
+                self.dirty_words.add(word)
                 self.save_data()
 
     def show_oxford_definitions(self):
+        current_item = self.word_list.currentItem()
+        if not current_item:
+            return
         self.oxford_dictionary_button.setEnabled(False)
-        word = self.word_list.currentItem().text()
-        worker = Worker(word, search_oxford_dictionary)
-        worker.signals.finished.connect(self.on_oxford_search_finished)
-        worker.signals.error.connect(self.on_oxford_search_failed)
-        self.threadpool.start(worker)
+        word = current_item.text()
+        self.scheduler.submit(
+            NETWORK,
+            ("oxford", word),
+            search_oxford_dictionary,
+            word,
+            group="selection",
+            on_finished=lambda link: self.on_oxford_search_finished(word, link),
+            on_error=self.on_oxford_search_failed,
+        )
 
     def on_oxford_search_finished(self, word, link):
         self.oxford_dictionary_button.setEnabled(True)
@@ -585,12 +878,30 @@ class DictionaryApp(QMainWindow):
         )
 
     def play_word(self):
-        self.play_sound_button.setEnabled(False)
         current_item = self.word_list.currentItem()
         if not current_item:
             return
+        self.play_sound_button.setEnabled(False)
         word = current_item.text()
-        worker = Worker(word, play_word)
-        worker.signals.finished.connect(lambda: self.play_sound_button.setEnabled(True))
-        worker.signals.error.connect(lambda: self.play_sound_button.setEnabled(True))
-        self.threadpool.start(worker)
+        # Joins a prefetch of the same word instead of fetching it again.
+        self.scheduler.submit(
+            NETWORK,
+            audio_key(word),
+            pronunciation,
+            word,
+            audio_urls(self.words_data.get(word, [])),
+            group="selection",
+            on_finished=lambda path: self.play_audio_file(word, path),
+            on_error=lambda _: self.play_sound_button.setEnabled(True),
+        )
+
+    def play_audio_file(self, word, path):
+        self.scheduler.submit(
+            AUDIO,
+            ("play", word),
+            play_audio,
+            path,
+            group="selection",
+            on_finished=lambda _: self.play_sound_button.setEnabled(True),
+            on_error=lambda _: self.play_sound_button.setEnabled(True),
+        )
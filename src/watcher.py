@@ -0,0 +1,53 @@
+"""
+Debounced change notification for data files.
+
+Files are replaced atomically on save, which makes ``QFileSystemWatcher``
+lose track of them, so the parent directory is watched as well and the file
+is re-added whenever it reappears. Bursts of events are coalesced into one
+``changed`` signal.
+"""
+
+import os
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+DEBOUNCE_MS = 200
+
+
+class FileChangeWatcher(QObject):
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._on_event)
+        self.watcher.directoryChanged.connect(self._on_event)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_MS)
+        self.timer.timeout.connect(self._emit)
+
+    def watch(self, path):
+        """Watch ``path`` instead of the previously watched file."""
+        self.timer.stop()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and os.path.isdir(directory):
+            self.watcher.addPath(directory)
+        self._rearm()
+
+    def _rearm(self):
+        if self.path and os.path.exists(self.path):
+            if self.path not in self.watcher.files():
+                self.watcher.addPath(self.path)
+
+    def _on_event(self, _path):
+        self.timer.start()
+
+    def _emit(self):
+        self._rearm()
+        self.changed.emit()